@@ -0,0 +1,99 @@
+# Loading of the game's fonts and sounds.
+#
+# Starting the sound system and decoding the WAV files can take a while, and none of it is needed to draw the first
+# frame. So fonts and sounds are loaded by a background thread, while the game gets going. The font is needed for the
+# first frame, so drawing text waits for it if it isn't ready yet. Sounds never make the game wait - if a sound hasn't
+# been loaded yet (or there is no sound device), it just isn't played.
+#
+# Asset files are found relative to this module, so the game can be run from any folder.
+
+import os
+import threading
+import time
+
+import pygame
+
+ASSET_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+
+
+# Full path of the asset with parm filename.
+def asset_path(filename):
+    return os.path.join(ASSET_FOLDER, filename)
+
+
+class AssetManager:
+
+    def __init__(self):
+        self.fonts = {}                             # Loaded fonts. Key is (font name, size).
+        self.sounds = {}                            # Decoded sounds. Key is filename.
+        self.timings = {}                           # Seconds taken to load each asset, in the order they were loaded.
+        self.sound_error = None                     # If the sound system couldn't be started, why not.
+
+        self.fonts_ready = threading.Event()        # Set when the background thread has loaded the fonts.
+        self.sounds_ready = threading.Event()       # Set when the background thread has finished with sounds.
+        self.loader = None
+
+    # Start a background thread that loads parm fonts, a list of (name, size), and then starts the sound system with
+    # parm num_channels and loads parm sound_filenames.
+    def start_loading(self, fonts, num_channels, sound_filenames):
+        self.loader = threading.Thread(target=self.load_all, args=(fonts, num_channels, sound_filenames),
+                                       name='AssetLoader', daemon=True)
+        self.loader.start()
+
+    def load_all(self, fonts, num_channels, sound_filenames):
+        try:
+            for (name, size) in fonts:
+                self.load_font(name, size)
+        finally:
+            self.fonts_ready.set()
+
+        try:
+            start_time = time.perf_counter()
+            pygame.mixer.init()
+            pygame.mixer.set_num_channels(num_channels)
+            self.timings['mixer'] = time.perf_counter() - start_time
+
+            for filename in sound_filenames:
+                start_time = time.perf_counter()
+                self.sounds[filename] = pygame.mixer.Sound(asset_path(filename))
+                self.timings[filename] = time.perf_counter() - start_time
+        except pygame.error as error:               # No sound device, most likely. Game carries on silently.
+            self.sound_error = error
+        finally:
+            self.sounds_ready.set()
+
+    def load_font(self, name, size):
+        start_time = time.perf_counter()
+        self.fonts[(name, size)] = pygame.font.SysFont(name, size)
+        self.timings[name + ' ' + str(size)] = time.perf_counter() - start_time
+
+    # The font called parm name, at parm size. Waits for the background thread if it is still loading fonts.
+    def font(self, name, size):
+        if self.loader is not None:
+            self.fonts_ready.wait()
+        if (name, size) not in self.fonts:          # Not asked for up front, so load it now.
+            self.load_font(name, size)
+        return self.fonts[(name, size)]
+
+    # The sound from parm filename, or None if it isn't loaded (yet).
+    def sound(self, filename):
+        if not self.sounds_ready.is_set():
+            return None
+        return self.sounds.get(filename)
+
+
+# A Pygame sound channel, that plays sounds by filename once they have been loaded by the asset manager.
+class SoundChannel:
+
+    def __init__(self, assets, channel_num):
+        self.assets = assets
+        self.channel_num = channel_num
+        self.channel = None                         # Pygame channel. Made once the sound system has been started.
+
+    def play(self, filename):
+        sound = self.assets.sound(filename)
+        if sound is None:
+            return
+        if self.channel is None:
+            self.channel = pygame.mixer.Channel(self.channel_num)
+        self.channel.play(sound)
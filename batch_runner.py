@@ -0,0 +1,108 @@
+# Run a large batch of seeded, headless games across all CPU cores, for balance tuning.
+#
+# Ships are flown by a simple random pilot. One line of results per game is streamed to the results file as each
+# game finishes, and a summary of the whole batch is printed at the end.
+#
+# python batch_runner.py --games 1000 --players 1 2
+
+import argparse
+import json
+import multiprocessing
+import random
+import time
+
+import space_rocks
+
+worker_config = None                        # Each worker process makes its own headless config, once.
+
+
+def start_worker(target_fps):
+    global worker_config
+    worker_config = space_rocks.Config(False, target_fps, headless=True)
+
+
+# Each tick, each ship has a random go at rotating, and at firing its gun.
+def random_pilot(game, pilot_random):
+    for p in game.players:
+        action = pilot_random.randint(1, 4)
+        if action == 1:
+            p.ship.rotate_clockwise()
+        elif action == 2:
+            p.ship.rotate_anticlockwise()
+
+        if pilot_random.randint(1, 3) == 1:
+            p.ship.fire_bullet(game.config)
+
+
+# Play one game from start to finish. Parm job is (seed, number of players, number of ticks).
+def play_one_game(job):
+    (seed, num_players, ticks) = job
+
+    pilot_random = random.Random(seed)      # Pilot has its own, so the pilot and game don't disturb each other.
+
+    worker_config.num_players = num_players
+    worker_config.demo_mode = False
+    game = space_rocks.Game(worker_config, seed)
+
+    start_time = time.perf_counter()
+    for t in range(ticks):
+        random_pilot(game, pilot_random)
+        game.update()
+    elapsed = time.perf_counter() - start_time
+
+    return {'seed': seed,
+            'players': num_players,
+            'ticks': game.tick_count,
+            'scores': [p.score for p in game.players],
+            'rocks_destroyed': [p.rocks_destroyed for p in game.players],
+            'ships_lost': [p.ships_lost for p in game.players],
+            'seconds': round(elapsed, 3)}
+
+
+# Print some totals and averages for the whole batch.
+def summarise(results, elapsed):
+    total_ticks = sum(r['ticks'] for r in results)
+    print('Games =', len(results), ' Ticks =', total_ticks, ' Seconds =', round(elapsed, 1),
+          ' Games per second =', round(len(results) / elapsed, 1),
+          ' Ticks per second =', round(total_ticks / elapsed))
+
+    for num_players in sorted(set(r['players'] for r in results)):
+        games = [r for r in results if r['players'] == num_players]
+        scores = [score for r in games for score in r['scores']]
+        rocks = [rocks for r in games for rocks in r['rocks_destroyed']]
+        deaths = [deaths for r in games for deaths in r['ships_lost']]
+
+        print(str(num_players) + ' player games =', len(games),
+              ' Score mean =', round(sum(scores) / len(scores), 1), 'min =', min(scores), 'max =', max(scores),
+              ' Rocks destroyed mean =', round(sum(rocks) / len(rocks), 1),
+              ' Ships lost mean =', round(sum(deaths) / len(deaths), 2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a batch of headless Space Rocks games.')
+    parser.add_argument('--games', type=int, default=100, help='Number of games of each player count.')
+    parser.add_argument('--players', type=int, nargs='+', default=[1, 2], choices=[1, 2])
+    parser.add_argument('--seed', type=int, default=1, help='Seed of the first game. Later games count up from it.')
+    parser.add_argument('--fps', type=int, default=25, help='Target FPS that the game logic is paced for.')
+    parser.add_argument('--seconds', type=int, default=60, help='Length of each game, in game seconds.')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--output', default='batch_results.jsonl', help='File that per-game results are written to.')
+    args = parser.parse_args()
+
+    ticks = args.seconds * args.fps
+    jobs = [(args.seed + g, num_players, ticks) for num_players in args.players for g in range(args.games)]
+
+    results = []
+    start_time = time.perf_counter()
+    with multiprocessing.Pool(args.workers, initializer=start_worker, initargs=(args.fps,)) as pool:
+        with open(args.output, 'w') as results_file:
+            # Results are written as soon as each game finishes, whatever order that happens in.
+            for result in pool.imap_unordered(play_one_game, jobs, chunksize=4):
+                results_file.write(json.dumps(result, separators=(',', ':')) + '\n')
+                results.append(result)
+
+    summarise(results, time.perf_counter() - start_time)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# Count the objects made by firing and moving bullets, and time it, with the fire key held down.
+# Run it from the top folder of the repo,
+# python benchmarks/bench_bullets.py
+#
+# Bullets, and the coordinate lists that cc.translation and cc.rotate_around_origin return, are the objects that the
+# bullet code used to make on every shot and every move. They are counted by wrapping the functions that make them.
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cartesian_coordinates as cc
+import space_rocks
+
+TICKS = 20000
+
+counts = {'Bullet': 0, 'cc.translation': 0, 'cc.rotate_around_origin': 0}
+
+
+# Wrap parm function of parm owner, so that each call to it is counted under parm name.
+def count_calls(owner, function_name, name):
+    function = getattr(owner, function_name)
+
+    def counted(*args, **kwargs):
+        counts[name] += 1
+        return function(*args, **kwargs)
+
+    setattr(owner, function_name, counted)
+
+
+config = space_rocks.Config(False, 25, headless=True)
+ship = space_rocks.SpaceShip([400, 300], config.RED)
+
+
+# One tick of a ship holding down fire and rotate, without any rocks to get in the way.
+def tick():
+    ship.rotate_clockwise()
+    ship.fire_bullet(config)
+    for b in ship.bullets:
+        b.move()
+        b.check_onscreen(config)
+    if any(b.kill for b in ship.bullets):
+        ship.bullet_pool.remove_dead()
+
+
+for t in range(500):                        # Get the ship to its limit of bullets in flight.
+    tick()
+
+start_time = time.perf_counter()
+for t in range(TICKS):
+    tick()
+elapsed = time.perf_counter() - start_time
+
+count_calls(space_rocks.Bullet, '__init__', 'Bullet')
+count_calls(cc, 'translation', 'cc.translation')
+count_calls(cc, 'rotate_around_origin', 'cc.rotate_around_origin')
+for t in range(TICKS):
+    tick()
+
+print(f'{1e6 * elapsed / TICKS:.2f} us per tick')
+for (name, count) in counts.items():
+    print(f'{name:24} {count / TICKS:6.2f} made per tick')
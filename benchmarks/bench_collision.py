@@ -0,0 +1,60 @@
+# Microbenchmark of the collision narrow phase. Compares Rock.check_collision, which does a radius check and then one
+# pass over the rock's edges, with the old way - a bounding square check and then 12 fan triangle tests.
+# Run it from the top folder of the repo,
+# python benchmarks/bench_collision.py
+
+import os
+import random
+import sys
+import timeit
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')          # No need for a real window or sound card.
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cartesian_coordinates as cc
+import space_rocks
+
+CALLS = 20000
+
+config = space_rocks.Config(False, 25, headless=True)
+rock = space_rocks.Rock(config, 'Large', random.Random(1))
+rock.coords = [400, 300]
+rock.rotation = 37
+
+
+# The way that Rock.check_collision used to work.
+def old_check_collision(rock, vertex):
+    collision = False
+    if (vertex[0] > rock.coords[0] - rock.radius - 15
+            and vertex[0] < rock.coords[0] + rock.radius + 15
+            and vertex[1] > rock.coords[1] - rock.radius - 15
+            and vertex[1] < rock.coords[1] + rock.radius + 15):
+        world_vertices = rock.world_vertices()
+        prev_vertex = world_vertices[-1]
+        for triangle_vertex in world_vertices:
+            if cc.is_inside_triangle(vertex, prev_vertex, triangle_vertex, rock.coords):
+                collision = True
+            prev_vertex = triangle_vertex
+    return collision
+
+
+def time_it(statement):
+    return min(timeit.repeat(statement, number=CALLS, repeat=5, globals=globals())) / CALLS * 1e6
+
+
+# Check that both ways agree, away from the edges of the rock where the old tolerance makes a difference.
+points = [[random.uniform(330, 470), random.uniform(230, 370)] for p in range(2000)]
+disagree = 0
+for point in points:
+    rock.check_collision(point)
+    if rock.collision != old_check_collision(rock, point):
+        disagree += 1
+print('Points where old and new disagree =', disagree, 'out of', len(points))
+
+for (label, point) in [('Hit, middle of rock', [400, 300]),
+                       ('Near miss, inside bounding box', [400 + rock.radius + 12, 300 + rock.radius + 12]),
+                       ('Miss, outside bounding box', [400 + 100, 300])]:
+    old = time_it('old_check_collision(rock, point)')
+    new = time_it('rock.check_collision(point)')
+    print(f'{label:32} old {old:7.2f} us   new {new:7.2f} us   speed up {old / new:5.1f}x')
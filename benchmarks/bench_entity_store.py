@@ -0,0 +1,27 @@
+# Compare ticks per second of the object-per-entity path with the struct-of-arrays entity store path.
+# Run it from the top folder of the repo,
+# python benchmarks/bench_entity_store.py
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import space_rocks
+
+TICKS = 500
+
+for num_rocks in [20, 100, 300]:
+    for use_store in [False, True]:
+        random.seed(1)
+        config = space_rocks.Config(False, 25, headless=True)
+        config.num_rocks = num_rocks
+        config.entity_store = use_store
+        config.demo_mode = False
+
+        game = space_rocks.Game(config)
+        ticks_per_second = game.step(TICKS)
+
+        label = 'entity store' if use_store else 'objects'
+        print(f'{num_rocks:4} rocks  {label:12}  {ticks_per_second:8.0f} ticks per second')
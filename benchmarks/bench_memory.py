@@ -0,0 +1,120 @@
+# Memory used by each kind of entity, and memory churned by each tick of a seeded game with lots of rocks.
+# Run it from the top folder of the repo,
+# python benchmarks/bench_memory.py [number of rocks]
+#
+# Bytes per entity are measured with tracemalloc, by making a lot of entities and dividing the memory they take up
+# between them. Includes everything that the entity owns, such as a ship's bullets, but not what it shares with other
+# entities, such as a rock's shape.
+#
+# Each tick is measured by how far tracemalloc's peak goes above the memory in use at the start of the tick (the
+# temporary objects made and thrown away by the tick), the number of coordinate lists made by cc.translation and
+# cc.rotate_around_origin, and how often the garbage collector runs.
+
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cartesian_coordinates as cc
+import entity_store
+import space_rocks
+
+SEED = 1
+ENTITIES = 2000                             # Number of each kind of entity made, to measure bytes per entity.
+WARMUP_TICKS = 100
+TICKS = 500
+ROCKS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+INPUTS = space_rocks.P1_CLOCKWISE | space_rocks.P1_FIRE | space_rocks.P2_ANTICLOCKWISE | space_rocks.P2_FIRE
+
+config = space_rocks.Config(False, 25, headless=True)
+
+
+# Average bytes taken by each of the entities that parm make returns.
+def bytes_per_entity(make):
+    rng = random.Random(SEED)
+    gc.collect()
+    tracemalloc.start()
+    entities = [make(rng) for e in range(ENTITIES)]
+    used = tracemalloc.get_traced_memory()[0] - sys.getsizeof(entities)
+    tracemalloc.stop()
+    return used / len(entities)
+
+
+gc_collections = [0, 0, 0]                  # Number of collections of each generation of the garbage collector.
+coord_lists = [0]                           # Number of coordinate lists made by the cc functions.
+
+
+# Wrap parm function of the cc module, so that each call to it is counted.
+def count_calls(function_name):
+    function = getattr(cc, function_name)
+
+    def counted(*args, **kwargs):
+        coord_lists[0] += 1
+        return function(*args, **kwargs)
+
+    setattr(cc, function_name, counted)
+    return function
+
+
+def count_collections(phase, info):
+    if phase == 'start':
+        gc_collections[info['generation']] += 1
+
+
+# Play a seeded game with lots of rocks, and measure the memory churned by each tick.
+def measure_ticks(use_entity_store):
+    config.entity_store = use_entity_store
+    config.num_players = 2
+    config.num_rocks = ROCKS
+    config.demo_mode = False                # Measure a real game, not the menu's demo of one.
+    game = space_rocks.Game(config, SEED)
+    for t in range(WARMUP_TICKS):
+        game.simulate_1_tick(INPUTS)
+
+    gc.collect()
+    gc_collections[:] = [0, 0, 0]
+    gc.callbacks.append(count_collections)
+    tracemalloc.start()
+    peaks = 0
+    for t in range(TICKS):
+        tracemalloc.reset_peak()
+        (before, peak) = tracemalloc.get_traced_memory()
+        game.simulate_1_tick(INPUTS)
+        peaks += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    gc.callbacks.remove(count_collections)
+
+    # Same ticks again, counting the coordinate lists made. Counting slows the ticks down, so isn't done while timing.
+    originals = [count_calls('translation'), count_calls('rotate_around_origin')]
+    coord_lists[0] = 0
+    for t in range(TICKS):
+        game.simulate_1_tick(INPUTS)
+    (cc.translation, cc.rotate_around_origin) = originals
+
+    print(f'{"entity store" if use_entity_store else "objects":14} {len(game.rocks):6} rocks '
+          f'{peaks / TICKS / 1024:8.1f} KB peak per tick {coord_lists[0] / TICKS:8.1f} coord lists per tick   '
+          f'GC runs per 1000 ticks {1000 * gc_collections[0] / TICKS:5.1f} / {1000 * gc_collections[1] / TICKS:4.1f} / '
+          f'{1000 * gc_collections[2] / TICKS:4.1f}')
+
+
+# Rock of parm class, placed at the side of the screen so that it has its coords and drift.
+def placed_rock(rock_class, rng, *args):
+    rock = rock_class(*args, config, 'Large', rng)
+    rock.place_on_side_of_screen(config, rng)
+    return rock
+
+
+store = entity_store.EntityStore()
+for (name, make) in [('Rock', lambda rng: placed_rock(space_rocks.Rock, rng)),
+                     ('StoredRock', lambda rng: placed_rock(space_rocks.StoredRock, rng, store)),
+                     ('Bullet', lambda rng: space_rocks.Bullet([400, 300], 0, config.RED)),
+                     ('SpaceShip', lambda rng: space_rocks.SpaceShip([400, 300], config.RED, None, rng)),
+                     ('Player', lambda rng: space_rocks.Player('Player 1', config.RED, [400, 300], None, rng))]:
+    print(f'{name:14} {bytes_per_entity(make):8.0f} bytes each')
+
+for use_entity_store in [False, True]:
+    measure_ticks(use_entity_store)
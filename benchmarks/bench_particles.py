@@ -0,0 +1,73 @@
+# Time drawing explosions, with one pygame.draw.circle call per particle (the way explosions used to be drawn), against
+# the particle system, which draws every particle with one call to blits.
+# Run it from the top folder of the repo,
+# python benchmarks/bench_particles.py
+
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pygame
+
+import cartesian_coordinates as cc
+import particles
+
+TICKS = 25                                  # One second of explosions at 25 FPS.
+RADIUS = 4
+COLOURS = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255)]
+
+# 36 vertex ship explosion outline, as in SpaceShip.
+OUTLINE = np.array([cc.rotate_around_origin([0, 15], a) for a in range(0, 360, 10)])
+
+screen = pygame.Surface((1000, 700))
+rng = np.random.default_rng(1)
+
+
+# Centres and outlines of parm number of explosions, each with parm particles per vertex.
+def make_explosions(explosions, per_vertex):
+    return [(rng.uniform(100, 900, 2).tolist(),
+             np.repeat(OUTLINE, per_vertex, axis=0) * rng.uniform(0.3, 1, (len(OUTLINE) * per_vertex, 1)),
+             COLOURS[e % len(COLOURS)]) for e in range(explosions)]
+
+
+# Draw each particle of parm explosions with its own call to pygame.draw.circle, for one second of explosion.
+def draw_circles(explosions):
+    for step in range(TICKS):
+        for (centre, outline, colour) in explosions:
+            for x, y in (centre + outline * 5 * step / TICKS).tolist():
+                pygame.draw.circle(screen, colour, (int(x), int(y)), RADIUS, RADIUS)
+
+
+# Draw parm explosions with the particle system, for one second of explosion.
+def draw_particle_system(explosions):
+    system = particles.ParticleSystem()
+    for (centre, outline, colour) in explosions:
+        system.emit(centre, outline * 5 / TICKS, TICKS, colour)
+    for step in range(TICKS):
+        system.draw(screen, RADIUS)
+        system.update()
+
+
+# Time parm function on parm explosions. Returns the time per tick in milliseconds, best of a few runs.
+def time_per_tick(function, explosions):
+    best = None
+    for r in range(5):
+        start_time = time.perf_counter()
+        function(explosions)
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return 1000 * best / TICKS
+
+
+print(f'{"Explosions":>10} {"Particles":>10} {"circles ms":>11} {"particles ms":>13} {"speedup":>8}')
+for per_vertex in [1, 10]:
+    for num_explosions in [1, 10, 40]:
+        explosions = make_explosions(num_explosions, per_vertex)
+        circles_ms = time_per_tick(draw_circles, explosions)
+        system_ms = time_per_tick(draw_particle_system, explosions)
+        print(f'{num_explosions:10} {num_explosions * len(OUTLINE) * per_vertex:10} {circles_ms:11.3f} '
+              f'{system_ms:13.3f} {circles_ms / system_ms:7.1f}x')
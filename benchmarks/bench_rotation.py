@@ -0,0 +1,39 @@
+# Microbenchmark of the trig lookup table, in the Rock.draw and Rock.check_collision code paths.
+# Run it from the top folder of the repo,
+# python benchmarks/bench_rotation.py
+
+import os
+import sys
+import timeit
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')          # No need for a real window or sound card.
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cartesian_coordinates as cc
+import space_rocks
+
+CALLS = 20000
+
+config = space_rocks.Config(False, 25)
+rock = space_rocks.Rock(config, 'Large')
+rock.coords = [400, 300]
+rock.rotation = 37
+
+hit = [400, 300]                            # Point in the middle of the rock, so the point-in-polygon test is done.
+
+
+def time_it(statement):
+    return min(timeit.repeat(statement, number=CALLS, repeat=5, globals=globals())) / CALLS * 1e6
+
+
+for (label, statement) in [('rotate_around_origin', 'cc.rotate_around_origin([3.0, 40.0], rock.rotation)'),
+                           ('batch_rotate_around_origin',
+                            'cc.batch_rotate_around_origin(rock.vertex_array, rock.rotation)'),
+                           ('Rock.check_collision', 'rock.check_collision(hit)'),
+                           ('Rock.draw', 'rock.draw(config)')]:
+    cc.use_trig_table = False
+    exact = time_it(statement)
+    cc.use_trig_table = True
+    table = time_it(statement)
+    print(f'{label:28} exact {exact:8.2f} us   table {table:8.2f} us   saving {exact - table:6.2f} us per call')
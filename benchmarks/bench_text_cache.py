@@ -0,0 +1,40 @@
+# Measure how much frame time the text cache saves in demo mode, which is where the game spends most of its time.
+# Run it from the top folder of the repo,
+# python benchmarks/bench_text_cache.py
+
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')          # No need for a real window or sound card.
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import space_rocks
+
+FRAMES = 500
+
+config = space_rocks.Config(False, 25)
+
+for use_text_cache in [False, True]:
+    random.seed(1)
+    config.use_text_cache = use_text_cache
+    game = space_rocks.Game(config)
+
+    text_time = 0
+    frame_time = 0
+    for f in range(FRAMES):
+        game.update()
+
+        start_time = time.perf_counter()
+        game.draw_all_elements()
+        frame_time += time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        game.draw_game_info()
+        game.draw_demo_info()
+        text_time += time.perf_counter() - start_time
+
+    label = 'text cache' if use_text_cache else 'no cache'
+    print(f'{label:10}  demo text {1000 * text_time / FRAMES:6.3f} ms   whole frame {1000 * frame_time / FRAMES:6.3f} ms')
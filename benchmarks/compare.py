@@ -0,0 +1,35 @@
+# Compare two sets of benchmark results, made by running the benchmark suite at two different commits.
+#
+# python benchmarks/compare.py old_results.json new_results.json
+
+import json
+import sys
+
+
+def load(filename):
+    with open(filename) as f:
+        return json.load(f)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print('Usage: python benchmarks/compare.py old_results.json new_results.json')
+        sys.exit(1)
+
+    old = load(sys.argv[1])
+    new = load(sys.argv[2])
+    old_medians = {b['name']: b['median'] for b in old['benchmarks']}
+
+    print('Old commit =', old['commit'], ' New commit =', new['commit'])
+    print(f'{"Benchmark":60} {"old ms":>9} {"new ms":>9} {"change":>8}')
+    for b in new['benchmarks']:
+        if b['name'] not in old_medians:
+            continue
+        old_ms = 1000 * old_medians[b['name']]
+        new_ms = 1000 * b['median']
+        change = 100 * (new_ms - old_ms) / old_ms if old_ms > 0 else 0
+        print(f'{b["name"]:60} {old_ms:9.3f} {new_ms:9.3f} {change:+7.1f}%')
+
+
+if __name__ == '__main__':
+    main()
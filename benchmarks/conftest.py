@@ -0,0 +1,89 @@
+# A small benchmark fixture, in the style of pytest-benchmark, so the suite runs with nothing but pytest installed.
+#
+# python -m pytest benchmarks -q
+#
+# Each benchmark calls its function a fixed number of rounds, and records the min, max, mean, median and standard
+# deviation in seconds. At the end of the session, all of the results are written to benchmarks/results.json (or the
+# file given by --benchmark-json), along with the git commit, so that results can be compared across commits with,
+#
+# python benchmarks/compare.py old_results.json new_results.json
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')          # No need for a real window or sound card.
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_FOLDER)
+
+results = []                                                # Results of every benchmark run this session.
+
+
+def pytest_addoption(parser):
+    parser.addoption('--benchmark-json', default=os.path.join(REPO_FOLDER, 'benchmarks', 'results.json'),
+                     help='File that the benchmark results are written to.')
+
+
+class Benchmark:
+
+    def __init__(self, name):
+        self.name = name
+        self.rounds = 100                                   # Number of timed calls.
+        self.warmup_rounds = 5                              # Calls before timing starts, to fill caches.
+
+    # Time parm func, called with parm args. Returns what the last call returned.
+    def __call__(self, func, *args):
+        for r in range(self.warmup_rounds):
+            func(*args)
+
+        times = []
+        result = None
+        for r in range(self.rounds):
+            start_time = time.perf_counter()
+            result = func(*args)
+            times.append(time.perf_counter() - start_time)
+
+        results.append({'name': self.name,
+                        'rounds': self.rounds,
+                        'min': min(times),
+                        'max': max(times),
+                        'mean': statistics.mean(times),
+                        'median': statistics.median(times),
+                        'stddev': statistics.stdev(times) if len(times) > 1 else 0})
+        return result
+
+
+@pytest.fixture
+def benchmark(request):
+    return Benchmark(request.node.name)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_FOLDER,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def pytest_sessionfinish(session):
+    if not results:
+        return
+
+    import numpy
+    import pygame
+
+    with open(session.config.getoption('--benchmark-json'), 'w') as f:
+        json.dump({'commit': git_commit(),
+                   'machine': platform.machine(),
+                   'python': platform.python_version(),
+                   'pygame': pygame.version.ver,
+                   'numpy': numpy.__version__,
+                   'benchmarks': results}, f, indent=2)
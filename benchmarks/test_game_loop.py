@@ -0,0 +1,123 @@
+# Benchmarks of the game loop, in seeded scenarios that come out the same every run.
+#
+# python -m pytest benchmarks -q
+
+import pygame
+import pytest
+
+import cartesian_coordinates as cc
+import space_rocks
+
+SEED = 1
+WARMUP_TICKS = 100                          # Ticks played before timing starts, so there are bullets and explosions.
+
+
+# Stands in for the Pygame clock, so that animate_1_tick isn't held back by the frame limiter.
+class UnlimitedClock:
+
+    def tick(self, framerate=0):
+        return 0
+
+    def get_fps(self):
+        return 0
+
+
+# Each scenario is (number of players, number of rocks, demo mode?, input mask held down every tick).
+SCENARIOS = {'demo': (1, 20, True, 0),
+             'firefight_1p': (1, 20, False, space_rocks.P1_CLOCKWISE | space_rocks.P1_FIRE),
+             'rocks_200': (1, 200, False, space_rocks.P1_ANTICLOCKWISE | space_rocks.P1_FIRE),
+             'max_bullets_2p': (2, 20, False, space_rocks.P1_FIRE | space_rocks.P2_CLOCKWISE | space_rocks.P2_FIRE)}
+
+
+# Make a game for parm scenario, and play it for a while. Returns (game, input mask).
+def make_game(scenario):
+    (num_players, num_rocks, demo_mode, inputs) = SCENARIOS[scenario]
+
+    config = space_rocks.Config(False, 25)
+    config.clock = UnlimitedClock()
+    config.fixed_timestep = False           # So that each call to animate_1_tick is exactly one tick.
+    config.num_players = num_players
+    config.num_rocks = num_rocks
+    config.demo_mode = demo_mode
+    config.monochrome = demo_mode
+
+    game = space_rocks.Game(config, SEED)
+    for t in range(WARMUP_TICKS):
+        game.simulate_1_tick(inputs)
+    return game, inputs
+
+
+@pytest.fixture(params=list(SCENARIOS))
+def scenario(request):
+    return make_game(request.param)
+
+
+def test_animate_1_tick(benchmark, scenario):
+    (game, inputs) = scenario
+
+    def tick():
+        game.apply_inputs(inputs)           # animate_1_tick doesn't read the keyboard, as handle_keys is False.
+        game.animate_1_tick()
+
+    benchmark(tick)
+
+
+def test_update(benchmark, scenario):
+    (game, inputs) = scenario
+    benchmark(game.simulate_1_tick, inputs)
+
+
+def test_check_collisions(benchmark, scenario):
+    (game, inputs) = scenario
+    benchmark(game.check_collisions)
+
+
+# Drawing is done onto an offscreen surface, rather than the display.
+def test_draw_rocks(benchmark, scenario):
+    (game, inputs) = scenario
+    game.config.screen = pygame.Surface(game.config.screen_size)
+
+    def draw_rocks():
+        for r in game.rocks:
+            r.draw(game.config, 0.5)
+
+    benchmark(draw_rocks)
+
+
+def test_draw_ships(benchmark, scenario):
+    (game, inputs) = scenario
+    game.config.screen = pygame.Surface(game.config.screen_size)
+
+    def draw_ships():
+        for p in game.players:
+            p.ship.draw(game.config, 0.5)
+            for b in p.ship.bullets:
+                b.draw(game.config, 0.5)
+
+    benchmark(draw_ships)
+
+
+# The cartesian_coordinates primitives. Each round is 1000 calls, so that the timer resolution doesn't matter.
+ROCK_OUTLINE = cc.batch_rotate_around_origin(space_rocks.np.array([[0, 40], [35, 20], [38, -18], [0, -45],
+                                                                   [-30, -25], [-42, 15]]), 0).tolist()
+
+PRIMITIVES = {'rotate_around_origin': lambda: cc.rotate_around_origin([3.0, 40.0], 37),
+              'rotate_around_origin_fraction': lambda: cc.rotate_around_origin([3.0, 40.0], 37.5),
+              'batch_rotate_around_origin': lambda: cc.batch_rotate_around_origin(space_rocks.np.array(ROCK_OUTLINE),
+                                                                                   37),
+              'translation': lambda: cc.translation([3.0, 40.0], [400, 300]),
+              'is_inside_polygon': lambda: cc.is_inside_polygon([5, 5], ROCK_OUTLINE),
+              'segment_hits_polygon': lambda: cc.segment_hits_polygon([-60, 5], [-40, 5], ROCK_OUTLINE),
+              'is_segment_near_circle': lambda: cc.is_segment_near_circle([-60, 5], [-40, 5], [0, 0], 45)}
+
+
+@pytest.mark.parametrize('primitive', list(PRIMITIVES))
+def test_cartesian_coordinates(benchmark, primitive):
+    func = PRIMITIVES[primitive]
+
+    def thousand_calls():
+        for c in range(1000):
+            func()
+
+    benchmark.rounds = 20
+    benchmark(thousand_calls)
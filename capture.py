@@ -0,0 +1,88 @@
+# Screenshots and frame captures, saved by a background thread.
+#
+# On the game thread, the pixels of the screen are copied into a bounded queue. That's just a memory copy. Encoding
+# the PNG and writing it to disk is done by the worker thread. If the worker can't keep up and the queue is full, the
+# frame is dropped and counted, rather than making the game wait.
+
+import queue
+import threading
+import time
+from collections import deque
+
+import pygame
+
+
+class FrameCapture:
+
+    def __init__(self, max_queued=16, max_fps=25):
+        self.frames = queue.Queue(max_queued)       # Frames waiting to be saved.
+        self.min_interval = 1 / max_fps             # Frames asked for more often than this are skipped.
+        self.last_capture_time = None
+
+        self.captured = 0                           # Number of frames put into the queue.
+        self.saved = 0                              # Number of frames written to disk.
+        self.dropped = 0                            # Number of frames thrown away because the queue was full.
+        self.throttled = 0                          # Number of frames skipped for being too soon after the last one.
+
+        self.encode_times = deque(maxlen=50)        # Seconds to encode and write each of the recent frames.
+        self.latencies = deque(maxlen=50)           # Seconds from capture to written, for each of the recent frames.
+
+        self.worker = None                          # Worker thread. Started when the first frame is captured.
+
+    # Copy the pixels of parm surface, to be saved as parm filename. Returns True if the frame was queued.
+    def capture(self, surface, filename):
+        now = time.perf_counter()
+        if self.last_capture_time is not None and now - self.last_capture_time < self.min_interval:
+            self.throttled += 1
+            return False
+
+        if self.frames.full():
+            self.dropped += 1
+            return False
+
+        self.last_capture_time = now
+        pixels = pygame.image.tostring(surface, 'RGB')
+        self.frames.put_nowait((filename, surface.get_size(), pixels, now))
+        self.captured += 1
+
+        if self.worker is None:
+            self.worker = threading.Thread(target=self.save_frames, name='FrameCapture', daemon=True)
+            self.worker.start()
+        return True
+
+    # Body of the worker thread. Saves frames until it is given None.
+    def save_frames(self):
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                return
+
+            (filename, size, pixels, capture_time) = frame
+            start_time = time.perf_counter()
+            pygame.image.save(pygame.image.fromstring(pixels, size, 'RGB'), filename)
+            end_time = time.perf_counter()
+
+            self.encode_times.append(end_time - start_time)
+            self.latencies.append(end_time - capture_time)
+            self.saved += 1
+
+    # Average milliseconds to encode a frame, and from capture to written, over the recent frames.
+    def average_encode_ms(self):
+        return average_ms(self.encode_times)
+
+    def average_latency_ms(self):
+        return average_ms(self.latencies)
+
+    # Wait for the frames in the queue to be saved, and stop the worker thread.
+    def close(self):
+        if self.worker is None:
+            return
+        self.frames.put(None)
+        self.worker.join()
+        self.worker = None
+
+
+def average_ms(seconds):
+    if not seconds:
+        return 0
+    return 1000 * sum(seconds) / len(seconds)
@@ -1,6 +1,8 @@
 # Functions for manipulating cartesian coordinates expressed as [x, y] lists.
+# The batch_ functions do the same, but for a whole numpy array of vertices, with shape (N, 2), in one call.
 
 import math
+import numpy as np
 
 
 # Convert vertex with float coordinates into integer coordinates.
@@ -24,14 +26,42 @@ def scale(vertex, scale_factor):
     [vertex_x, vertex_y] = vertex
     return [vertex_x * scale_factor, vertex_y * scale_factor]
 
+
+# Find the coordinate that is parm fraction of the way from vertex v1 to vertex v2.
+# Fraction 0 gives v1, fraction 1 gives v2.
+def interpolate(v1, v2, fraction):
+    return [v1[0] + (v2[0] - v1[0]) * fraction,
+            v1[1] + (v2[1] - v1[1]) * fraction]
+
+
+# Ships rotate in 10 degree steps, and rocks rotate by a whole number of degrees each tick. So nearly every angle
+# that gets rotated by is a whole number of degrees, and its sin and cos can be looked up rather than calculated.
+SIN_COS_TABLE = [(math.sin(math.radians(degrees)), math.cos(math.radians(degrees))) for degrees in range(360)]
+
+use_trig_table = True           # False = always calculate sin and cos exactly.
+
+
+# Return the sin and cos of parm angle. Uses the lookup table if the angle is a whole number of degrees.
+# Ships and rocks in objects have int angles. Rocks in an entity store have float angles, which are still whole numbers.
+def sin_cos(rotation_degrees):
+    if use_trig_table:
+        if type(rotation_degrees) is int:
+            return SIN_COS_TABLE[rotation_degrees % 360]
+        if rotation_degrees.is_integer():
+            return SIN_COS_TABLE[int(rotation_degrees) % 360]
+
+    rotation_radians = math.radians(rotation_degrees)
+    return math.sin(rotation_radians), math.cos(rotation_radians)
+
+
 # For explanation of the maths, see,
 # https://en.wikipedia.org/wiki/Rotation_of_axes#Derivation
 def rotate_around_origin(vertex, rotation_degrees):
     [vertex_x, vertex_y] = vertex
-    rotation_radians = math.radians(rotation_degrees)
+    (sin_r, cos_r) = sin_cos(rotation_degrees)
 
-    return[vertex_x * math.cos(rotation_radians) + vertex_y * math.sin(rotation_radians),
-           - vertex_x * math.sin(rotation_radians) + vertex_y * math.cos(rotation_radians)
+    return[vertex_x * cos_r + vertex_y * sin_r,
+           - vertex_x * sin_r + vertex_y * cos_r
            ]
 
 
@@ -80,3 +110,98 @@ def is_inside_triangle(v, v1, v2, v3):
         return True
     else:
         return False
+
+
+# Is vertex v inside the polygon made by parm vertices, a list of [x, y] in order (either way round)?
+# Imagine a ray going rightwards from v. If it crosses an odd number of the polygon's edges, then v is inside.
+# This is one pass over the edges, and there are no areas to compare, so no tolerance is needed.
+def is_inside_polygon(v, vertices):
+    (x, y) = v
+    inside = False
+
+    (x1, y1) = vertices[-1]                     # So we have 2 vertices for the first edge.
+    for (x2, y2) in vertices:
+        if (y1 > y) != (y2 > y):                # Does the edge go across the horizontal line through v?
+            # If the edge crosses that line to the right of v, the ray crosses the edge.
+            if x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+        (x1, y1) = (x2, y2)
+
+    return inside
+
+
+# Does the line segment from v1 to v2 touch the polygon made by parm vertices? If it does, returns how far along the
+# segment it first touches the polygon, from 0 (at v1) to 1 (at v2). If it doesn't, returns None.
+# The segment could go right through the polygon without either end being inside it, so each edge is tested for
+# crossing the segment. In the same pass over the edges, v1 is tested for being inside, as in is_inside_polygon.
+def segment_hits_polygon(v1, v2, vertices):
+    (x, y) = v1
+    (dx, dy) = (v2[0] - x, v2[1] - y)
+    inside = False
+    first_hit = None
+
+    (x1, y1) = vertices[-1]                     # So we have 2 vertices for the first edge.
+    for (x2, y2) in vertices:
+        if (y1 > y) != (y2 > y):
+            if x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+
+        # Solve v1 + t * (v2 - v1) = edge start + u * (edge end - edge start). If t and u are both between 0 and 1,
+        # the segment and edge cross. If denominator is 0, they are parallel, so don't cross.
+        (ex, ey) = (x2 - x1, y2 - y1)
+        denominator = dx * ey - dy * ex
+        if denominator != 0:
+            (qx, qy) = (x1 - x, y1 - y)
+            t = (qx * ey - qy * ex) / denominator
+            u = (qx * dy - qy * dx) / denominator
+            if 0 <= t <= 1 and 0 <= u <= 1 and (first_hit is None or t < first_hit):
+                first_hit = t
+        (x1, y1) = (x2, y2)
+
+    if inside:                                  # Segment starts inside the polygon.
+        return 0
+    return first_hit
+
+
+# Does the line segment from v1 to v2 pass within parm radius of parm centre?
+def is_segment_near_circle(v1, v2, centre, radius):
+    (dx, dy) = (v2[0] - v1[0], v2[1] - v1[1])
+    length_squared = dx * dx + dy * dy
+
+    # Find the point on the segment that is closest to the centre.
+    t = 0
+    if length_squared > 0:
+        t = ((centre[0] - v1[0]) * dx + (centre[1] - v1[1]) * dy) / length_squared
+        t = max(0, min(1, t))
+    return is_inside_circle([v1[0] + t * dx, v1[1] + t * dy], centre, radius)
+
+
+# Is vertex v inside (or on the edge of) the circle with parm centre and radius? No square roots needed.
+def is_inside_circle(v, centre, radius):
+    dx = v[0] - centre[0]
+    dy = v[1] - centre[1]
+    return dx * dx + dy * dy <= radius * radius
+
+
+# Batch version of integer_coord.
+def batch_integer_coord(vertices):
+    return np.rint(vertices).astype(int)
+
+
+# Batch version of translation. All vertices are moved by the same delta.
+def batch_translation(vertices, delta):
+    return vertices + delta
+
+
+# Batch version of scale.
+def batch_scale(vertices, scale_factor):
+    return vertices * scale_factor
+
+
+# Batch version of rotate_around_origin. The sin and cos are only calculated once for the whole batch.
+def batch_rotate_around_origin(vertices, rotation_degrees):
+    (sin_r, cos_r) = sin_cos(rotation_degrees)
+
+    # [x, y] multiplied by this matrix gives the same result as rotate_around_origin.
+    return vertices @ np.array([[cos_r, -sin_r],
+                                [sin_r, cos_r]])
@@ -0,0 +1,109 @@
+# Struct-of-arrays storage for rocks and bullets.
+#
+# Rather than each rock keeping its own coords, drift, rotation, etc., the values for all of the rocks are kept
+# together in numpy arrays, one row per rock. That way, moving every rock - or checking whether every rock is still
+# on screen - is one numpy operation per tick, instead of one Python method call per rock.
+
+import numpy as np
+
+
+class EntityStore:
+
+    def __init__(self, capacity=64):
+        self.count = 0                                  # Number of rows in use. Rows 0 to count - 1 are live.
+        self.owners = []                                # Object that each live row belongs to.
+        self.move_count = 0                             # Number of times move_all has been done.
+
+        self.coords = np.zeros((capacity, 2))           # [x, y] of each entity.
+        self.prev_coords = np.zeros((capacity, 2))      # [x, y] of each entity, before the last move.
+        self.drift = np.zeros((capacity, 2))            # Amount each entity moves by each tick.
+        self.rotation = np.zeros(capacity)              # Current rotation in degrees.
+        self.prev_rotation = np.zeros(capacity)         # Rotation before the last move.
+        self.rotation_speed = np.zeros(capacity)        # Degrees per tick.
+        self.radius = np.zeros(capacity)
+        self.max_radius = np.zeros(capacity)            # Distance from centre to furthest vertex.
+        self.kill = np.zeros(capacity, dtype=bool)
+        self.exploding = np.zeros(capacity, dtype=bool)
+        self.explosion_step = np.zeros(capacity, dtype=int)
+
+    # Names of all of the arrays, one row per entity.
+    fields = ['coords', 'prev_coords', 'drift', 'rotation', 'prev_rotation', 'rotation_speed', 'radius', 'max_radius',
+              'kill', 'exploding', 'explosion_step']
+
+    # Give parm owner a row in the arrays. Returns the slot number of the row.
+    def add(self, owner):
+        if self.count == len(self.kill):                # Out of rows, so double the size of all of the arrays.
+            for field in self.fields:
+                old = getattr(self, field)
+                new = np.zeros((2 * len(old),) + old.shape[1:], dtype=old.dtype)
+                new[:len(old)] = old
+                setattr(self, field, new)
+
+        slot = self.count
+        for field in self.fields:
+            getattr(self, field)[slot] = 0
+        self.owners.append(owner)
+        self.count += 1
+        return slot
+
+    # Free the parm slot, by moving the last row into it. The owner of the moved row is told its new slot number.
+    def remove(self, slot):
+        last = self.count - 1
+        if slot != last:
+            for field in self.fields:
+                array = getattr(self, field)
+                array[slot] = array[last]
+
+            moved_owner = self.owners[last]
+            moved_owner.slot = slot
+            self.owners[slot] = moved_owner
+
+        self.owners.pop()
+        self.count -= 1
+
+    # Move every entity by one tick.
+    def move_all(self):
+        n = self.count
+        self.prev_coords[:n] = self.coords[:n]
+        self.prev_rotation[:n] = self.rotation[:n]
+        self.coords[:n] += self.drift[:n]
+        self.rotation[:n] += self.rotation_speed[:n]
+        self.move_count += 1
+
+    # Flag any entities that have strayed outside of the game screen to be killed off.
+    def check_onscreen(self, config):
+        n = self.count
+        x = self.coords[:n, 0]
+        y = self.coords[:n, 1]
+        self.kill[:n] |= ((x < config.left_dead) | (x > config.right_dead)
+                          | (y < config.top_dead) | (y > config.bottom_dead))
+
+    # Do one step of the explosion animation of every exploding entity. Entities that have done parm last_step steps
+    # are flagged to be killed. Returns the owners of the entities that have just reached parm half_step,
+    # in the order of their rows.
+    def step_explosions(self, last_step, half_step):
+        n = self.count
+        exploding = self.exploding[:n]
+        stepping = exploding & (self.explosion_step[:n] < last_step)
+
+        self.explosion_step[:n][stepping] += 1
+        self.kill[:n] |= exploding & ~stepping
+
+        at_half_step = np.flatnonzero(exploding & (self.explosion_step[:n] == half_step))
+        return [self.owners[slot] for slot in at_half_step]
+
+
+# Make a property that reads and writes the parm field of an entity's row in its store.
+# If there is a parm also_field, writes go to that field too. For example, when a rock is given its starting coords,
+# they are its previous coords as well.
+def array_property(field, also_field=None):
+
+    def get_field(self):
+        return getattr(self.store, field)[self.slot]
+
+    def set_field(self, value):
+        getattr(self.store, field)[self.slot] = value
+        if also_field is not None:
+            getattr(self.store, also_field)[self.slot] = value
+
+    return property(get_field, set_field)
@@ -4,5 +4,7 @@ import space_rocks
 
 this_config = space_rocks.Config(True,          # Debug mode?
                                  25)            # Target FPS.
+this_config.profile = True                      # Time each phase of each frame.
+this_config.record_replays = True               # Save a replay of each game, for chasing down bugs.
 
 this_config.choose_options()
@@ -0,0 +1,71 @@
+# Buffered logging, written out by a background thread.
+#
+# The game thread only puts a small record - time, message and its arguments - into a bounded buffer. Formatting the
+# message and writing it out is done by the writer thread, so that logging doesn't cause spikes in frame times.
+# If the buffer is full, the record is thrown away and counted, rather than making the game wait.
+
+import datetime
+import sys
+import threading
+import time
+from collections import deque
+
+
+class Logger:
+
+    def __init__(self, capacity=4096, stream=None):
+        self.capacity = capacity                    # Most records that can be waiting to be written.
+        self.stream = stream                        # Where records are written to. None = stdout.
+        self.records = deque()                      # Records waiting to be written, oldest first.
+        self.dropped = 0                            # Number of records thrown away because the buffer was full.
+        self.written = 0
+
+        self.wake = threading.Event()               # Set when there are records to write, or logger is closing.
+        self.closing = False
+        self.writer = None                          # Writer thread. Started when the first record is logged.
+
+    # Log parm message. It is formatted later, on the writer thread, as message % args.
+    def log(self, message, *args):
+        if len(self.records) >= self.capacity:
+            self.dropped += 1
+            return
+
+        self.records.append((time.time(), message, args))
+        if self.writer is None:
+            self.start()
+        self.wake.set()
+
+    def start(self):
+        self.writer = threading.Thread(target=self.write_records, name='Logger', daemon=True)
+        self.writer.start()
+
+    # Body of the writer thread. Keeps writing records until the logger is closed and the buffer is empty.
+    def write_records(self):
+        stream = self.stream or sys.stdout
+        while True:
+            self.wake.wait()
+            self.wake.clear()
+
+            while self.records:
+                (when, message, args) = self.records.popleft()
+                if args:
+                    message = message % args
+                stream.write(str(datetime.datetime.fromtimestamp(when)) + ' ' + message + '\n')
+                self.written += 1
+            stream.flush()
+
+            if self.closing and not self.records:
+                return
+
+    # Write out any records that are still waiting, and stop the writer thread.
+    def close(self):
+        if self.writer is None:
+            return
+        if self.dropped:
+            self.records.append((time.time(), '%d log records were dropped, as the buffer was full.', (self.dropped,)))
+
+        self.closing = True
+        self.wake.set()
+        self.writer.join()
+        self.writer = None
+        self.closing = False
@@ -0,0 +1,106 @@
+# Particles for explosions.
+#
+# The positions, velocities and lifetimes of every particle in the game are kept together in numpy arrays. So moving
+# all of the particles, and getting rid of the ones that have burnt out, is a few numpy operations per tick however many
+# explosions are going on. All of the particles are drawn with a single call to blits.
+#
+# Particles are just for show. They don't take part in the game logic, so they can use the global numpy random numbers
+# without upsetting replays.
+
+import numpy as np
+import pygame
+
+
+# Velocities for an explosion with parm copies of each of parm velocities. The extra copies are slowed down by a random
+# amount, so that they fill in the gaps between the particles of the first copy.
+def spread(velocities, copies):
+    if copies <= 1:
+        return velocities
+    extra = np.repeat(velocities, copies - 1, axis=0)
+    extra *= np.random.uniform(0.3, 1, (len(extra), 1))
+    return np.concatenate([velocities, extra])
+
+
+class ParticleSystem:
+
+    def __init__(self, capacity=1024):
+        self.count = 0                                      # Number of live particles, in rows 0 to count - 1.
+        self.positions = np.zeros((capacity, 2))            # [x, y] of each particle.
+        self.velocities = np.zeros((capacity, 2))           # Amount each particle moves each tick.
+        self.ages = np.zeros(capacity, dtype=int)           # Number of ticks that each particle has been alive.
+        self.lifetimes = np.zeros(capacity, dtype=int)      # Particle burns out when its age reaches its lifetime.
+        self.colour_nums = np.zeros(capacity, dtype=int)    # Position of each particle's colour in the palette.
+
+        self.palette = []                                   # Colours of the particles.
+        self.sprites = {}                                   # Rendered particles. Key is (colour, radius).
+
+    # Add a particle for each of parm velocities, all starting at parm centre. Parm lifetimes is the number of ticks
+    # each particle lasts for - either one number for all of them, or one for each.
+    def emit(self, centre, velocities, lifetimes, colour):
+        new_count = len(velocities)
+        while self.count + new_count > len(self.ages):     # Out of rows, so double the size of all of the arrays.
+            for name in ['positions', 'velocities', 'ages', 'lifetimes', 'colour_nums']:
+                old = getattr(self, name)
+                new = np.zeros((2 * len(old),) + old.shape[1:], dtype=old.dtype)
+                new[:len(old)] = old
+                setattr(self, name, new)
+
+        colour = tuple(colour)
+        if colour not in self.palette:
+            self.palette.append(colour)
+
+        rows = slice(self.count, self.count + new_count)
+        self.positions[rows] = centre
+        self.velocities[rows] = velocities
+        self.ages[rows] = 0
+        self.lifetimes[rows] = lifetimes
+        self.colour_nums[rows] = self.palette.index(colour)
+        self.count += new_count
+
+    # Move all of the particles by one tick, and get rid of any that have burnt out.
+    def update(self):
+        n = self.count
+        if n == 0:
+            return
+
+        self.positions[:n] += self.velocities[:n]
+        self.ages[:n] += 1
+
+        alive = self.ages[:n] < self.lifetimes[:n]
+        if not alive.all():
+            live_count = int(alive.sum())
+            for array in [self.positions, self.velocities, self.ages, self.lifetimes, self.colour_nums]:
+                array[:live_count] = array[:n][alive]
+            self.count = live_count
+
+        if self.count == 0:
+            self.palette = []
+
+    # Small circle of parm colour and radius, on a see-through background.
+    def sprite(self, colour, radius):
+        key = (colour, radius)
+        if key not in self.sprites:
+            sprite = pygame.Surface((2 * radius + 1, 2 * radius + 1))
+            pygame.draw.circle(sprite, colour, (radius, radius), radius, radius)
+            sprite.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+            self.sprites[key] = sprite
+        return self.sprites[key]
+
+    # Draw all of the particles onto parm surface, parm alpha of the way through the current tick. If parm colour is
+    # given, all of the particles are drawn in that colour. Returns list of the rectangles that have been drawn on.
+    def draw(self, surface, radius, alpha=1, colour=None):
+        n = self.count
+        if n == 0:
+            return []
+
+        # Particles move in straight lines, so where they were part way through the tick is easy to work out.
+        positions = self.positions[:n] - self.velocities[:n] * (1 - alpha)
+        corners = (np.rint(positions).astype(int) - radius).tolist()
+
+        if colour is not None:
+            sprite = self.sprite(tuple(colour), radius)
+            return surface.blits([(sprite, corner) for corner in corners])
+
+        sprites = [self.sprite(c, radius) for c in self.palette]
+        return surface.blits([(sprites[colour_num], corner)
+                              for (colour_num, corner) in zip(self.colour_nums[:n].tolist(), corners)])
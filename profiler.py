@@ -0,0 +1,155 @@
+# Per-phase frame profiler.
+#
+# Each phase of a frame (input, moving bullets, moving rocks, collisions, drawing, flip, etc.) is timed with,
+#
+#     with profiler.phase('Collisions'):
+#         ...
+#
+# A rolling average of the time spent in each phase, over the last few frames, is kept for the debug overlay. While a
+# trace is on (between start_trace() and stop_trace(), which Game.play() does for each game that is played), every
+# phase is also kept as an event, so that the game can be exported in Chrome trace format and looked at offline,
+# in chrome://tracing or https://ui.perfetto.dev
+#
+# When profiling is switched off, games use a NullProfiler instead, which does nothing at all.
+
+import json
+import os
+import time
+from collections import deque
+
+
+# Times one phase. Made by FrameProfiler.phase().
+class Phase:
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.add(self.name, self.start, time.perf_counter())
+
+
+class FrameProfiler:
+
+    def __init__(self, window=50, max_events=200000):
+        self.window = window                        # Number of frames that the rolling averages are over.
+        self.max_events = max_events                # Most events kept for the trace. Later ones are dropped.
+
+        self.phase_names = []                       # Names of the phases, in the order they were first seen.
+        self.frame_times = {}                       # Seconds spent in each phase so far this frame.
+        self.history = {}                           # For each phase, deque of its seconds in each recent frame.
+        self.frames = 0                             # Number of frames profiled.
+        self.frame_start = None                     # Time that the current frame started.
+
+        self.tracing = False                        # True if events are being kept for the trace.
+        self.origin = time.perf_counter()           # Trace event times are relative to this.
+        self.events = []                            # (name, start, end) of every phase, for the trace.
+        self.dropped_events = 0
+
+    # Start keeping events for a new trace, throwing away any from an earlier one.
+    def start_trace(self):
+        self.tracing = True
+        self.origin = time.perf_counter()
+        self.events = []
+        self.dropped_events = 0
+
+    # Stop keeping events, and let go of the ones kept so far.
+    def stop_trace(self):
+        self.tracing = False
+        self.events = []
+
+    # Start timing a phase called parm name.
+    def phase(self, name):
+        return Phase(self, name)
+
+    # Record that the parm name phase ran from parm start to parm end time.
+    # A phase can run several times in one frame, for example when a frame does more than one tick of game logic.
+    def add(self, name, start, end):
+        if name not in self.frame_times:
+            if name not in self.history:
+                self.phase_names.append(name)
+                self.history[name] = deque(maxlen=self.window)
+            self.frame_times[name] = 0
+        self.frame_times[name] += end - start
+
+        if self.tracing:
+            if len(self.events) < self.max_events:
+                self.events.append((name, start, end))
+            else:
+                self.dropped_events += 1
+
+    def begin_frame(self):
+        self.frame_start = time.perf_counter()
+
+    # Add this frame's phase times to the rolling history.
+    def end_frame(self):
+        if self.frame_start is not None:
+            self.add('Frame', self.frame_start, time.perf_counter())
+            self.frame_start = None
+
+        for name in self.phase_names:
+            self.history[name].append(self.frame_times.get(name, 0))
+        self.frame_times = {}
+        self.frames += 1
+
+    # Returns list of (phase name, average milliseconds per frame), over the rolling window.
+    def breakdown(self):
+        averages = []
+        for name in self.phase_names:
+            times = self.history[name]
+            if times:
+                averages.append((name, 1000 * sum(times) / len(times)))
+        return averages
+
+    # Write all of the events to parm filename, in Chrome trace JSON format.
+    def export_chrome_trace(self, filename):
+        trace_events = []
+        for (name, start, end) in self.events:
+            trace_events.append({'name': name,
+                                 'ph': 'X',                             # A complete event, with a duration.
+                                 'ts': round(1000000 * (start - self.origin), 1),
+                                 'dur': round(1000000 * (end - start), 1),
+                                 'pid': os.getpid(),
+                                 'tid': 0})
+
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms',
+                       'otherData': {'frames': self.frames, 'dropped_events': self.dropped_events}}, f)
+
+
+# Does nothing, very quickly. Used when profiling is switched off.
+class NullPhase:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+class NullProfiler:
+
+    null_phase = NullPhase()                        # One phase object, shared by every phase.
+
+    def phase(self, name):
+        return self.null_phase
+
+    def start_trace(self):
+        pass
+
+    def stop_trace(self):
+        pass
+
+    def begin_frame(self):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def breakdown(self):
+        return []
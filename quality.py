@@ -0,0 +1,90 @@
+# Adaptive quality governor.
+#
+# Keeps a rolling average of how long each frame takes to do. If frames take longer than the time budget for a tick,
+# drawing detail is turned down a level - fewer explosion particles, then outline graphics instead of filled colour
+# polygons, then fewer rock vertices. When there is plenty of time to spare again, detail is turned back up.
+#
+# So that the quality doesn't flap up and down, the level only steps down when frames are over budget, only steps up
+# when they are well under it, and after each change the rolling average starts afresh.
+#
+# Only drawing is changed, never game logic, so games play the same at every quality level.
+
+from collections import deque
+
+# Each level is (name, draw outlines instead of filled polygons?, particle_step, rock_vertex_step). Highest quality
+# first. Every particle_step'th explosion particle is made, and every rock_vertex_step'th vertex of each rock is drawn.
+LEVELS = [('High', False, 1, 1),
+          ('Fewer particles', False, 2, 1),
+          ('Outlines', True, 2, 1),
+          ('Low', True, 4, 2)]
+
+
+class QualityGovernor:
+
+    # Parm config is the game config that the quality settings are made in. The budget for each frame is one tick.
+    # Quality steps down when the average frame takes more than parm down_fraction of the budget, and up when it
+    # takes less than parm up_fraction of it, averaged over parm window frames.
+    def __init__(self, config, window=50, down_fraction=1.0, up_fraction=0.5):
+        self.config = config
+        self.budget = 1 / config.target_fps             # Seconds available for each frame.
+        self.down_fraction = down_fraction
+        self.up_fraction = up_fraction
+
+        self.level = 0                                  # Position in LEVELS of the current quality level.
+        self.frame_times = deque(maxlen=window)         # Seconds taken by each recent frame.
+        self.changes = 0                                # Number of times the quality level has changed.
+        self.saved_monochrome = None                    # Value of config.monochrome before outlines were turned on.
+
+        # Start at the highest quality. The config is shared by every game, so might still have the lower detail
+        # settings that an earlier game's governor left behind.
+        (name, outlines, particle_step, rock_vertex_step) = LEVELS[self.level]
+        self.config.particle_step = particle_step
+        self.config.rock_vertex_step = rock_vertex_step
+
+    def name(self):
+        return LEVELS[self.level][0]
+
+    # Average seconds per frame, over the recent frames.
+    def average_frame_time(self):
+        if len(self.frame_times) == 0:
+            return 0
+        return sum(self.frame_times) / len(self.frame_times)
+
+    # Record that a frame took parm seconds to do, and change the quality level if need be.
+    def frame_done(self, seconds):
+        self.frame_times.append(seconds)
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return                                      # Not enough frames since the last change to go on.
+
+        average = self.average_frame_time()
+        if average > self.down_fraction * self.budget and self.level < len(LEVELS) - 1:
+            self.set_level(self.level + 1, average)
+        elif average < self.up_fraction * self.budget and self.level > 0:
+            self.set_level(self.level - 1, average)
+
+    # Change to parm level of quality. Parm average is the frame time that caused the change, for the log.
+    def set_level(self, level, average=None):
+        (name, outlines, particle_step, rock_vertex_step) = LEVELS[level]
+        old_outlines = LEVELS[self.level][1]
+
+        if outlines and not old_outlines:
+            self.saved_monochrome = self.config.monochrome
+            self.config.monochrome = True                   # Monochrome graphics are all outlines, so are quicker.
+        elif old_outlines and not outlines:
+            self.config.monochrome = self.saved_monochrome
+
+        self.config.particle_step = particle_step
+        self.config.rock_vertex_step = rock_vertex_step
+
+        if level != self.level:
+            self.changes += 1
+            if average is not None and self.config.debug:
+                self.config.logger.log('Quality %s -> %s, average frame %.1f ms, budget %.1f ms.',
+                                       self.name(), name, 1000 * average, 1000 * self.budget)
+        self.level = level
+        self.frame_times.clear()                            # Start the rolling average afresh at the new level.
+
+    # Go back to the highest quality, for example at the end of a game.
+    def restore(self):
+        self.set_level(0)
+
@@ -0,0 +1,182 @@
+# Recording and re-simulation of games.
+#
+# Everything random in a game comes from the game's own seeded random number generator. So to replay a game, all that
+# needs to be kept is the seed, a few config settings, and the input mask of the players' controls for each tick.
+# Players tend to hold keys down for many ticks at a time, so the input masks are run-length encoded.
+#
+# Every few ticks, a checksum of the game state is recorded too. When the replay is re-simulated, the checksums are
+# compared, so that any divergence from the original game is spotted at (about) the tick that it happened.
+#
+# python replay.py replays/replay20200101_120000.srr
+
+import argparse
+import struct
+import sys
+import time
+
+import cartesian_coordinates as cc
+
+MAGIC = b'SRRP'
+VERSION = 2
+
+# Magic, version, seed, ticks, number of players, target FPS, number of rocks, checksum interval, flags.
+HEADER = struct.Struct('<4sBIIBHHHB')
+RUN = struct.Struct('<BH')                  # Input mask, and number of ticks in a row that it was held for.
+COUNT = struct.Struct('<I')
+CHECKSUM = struct.Struct('<I')
+
+MAX_RUN = 65535                             # Most ticks that fit into one run.
+
+# Bits of the flags in the header, for config settings that change the results of the game logic.
+FLAG_TRIG_TABLE = 1
+FLAG_ENTITY_STORE = 2
+
+
+class Replay:
+
+    def __init__(self, seed, num_players, target_fps, num_rocks, checksum_interval, flags):
+        self.seed = seed
+        self.num_players = num_players
+        self.target_fps = target_fps
+        self.num_rocks = num_rocks
+        self.checksum_interval = checksum_interval
+        self.flags = flags
+
+        self.ticks = 0
+        self.runs = []                      # List of [input mask, number of ticks].
+        self.checksums = []                 # Checksum of game state after every checksum_interval ticks.
+
+    # Input mask for each tick, one at a time.
+    def inputs(self):
+        for (inputs, count) in self.runs:
+            for c in range(count):
+                yield inputs
+
+    # Write the replay to parm filename.
+    def save(self, filename):
+        with open(filename, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.seed, self.ticks, self.num_players, self.target_fps,
+                                self.num_rocks, self.checksum_interval, self.flags))
+
+            f.write(COUNT.pack(len(self.runs)))
+            for (inputs, count) in self.runs:
+                f.write(RUN.pack(inputs, count))
+
+            f.write(COUNT.pack(len(self.checksums)))
+            for checksum in self.checksums:
+                f.write(CHECKSUM.pack(checksum))
+
+    # Read a replay from parm filename.
+    @staticmethod
+    def load(filename):
+        with open(filename, 'rb') as f:
+            data = f.read()
+
+        (magic, version, seed, ticks, num_players, target_fps, num_rocks, checksum_interval, flags) = \
+            HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(filename + ' is not a version ' + str(VERSION) + ' Space Rocks replay.')
+
+        this_replay = Replay(seed, num_players, target_fps, num_rocks, checksum_interval, flags)
+        this_replay.ticks = ticks
+
+        offset = HEADER.size
+        (num_runs,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        this_replay.runs = [list(run) for run in RUN.iter_unpack(data[offset:offset + num_runs * RUN.size])]
+        offset += num_runs * RUN.size
+
+        (num_checksums,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        checksum_data = data[offset:offset + num_checksums * CHECKSUM.size]
+        this_replay.checksums = [checksum for (checksum,) in CHECKSUM.iter_unpack(checksum_data)]
+
+        return this_replay
+
+
+# Records a game while it is being played, one tick at a time.
+class Recorder(Replay):
+
+    def __init__(self, game):
+        config = game.config
+        flags = 0
+        if cc.use_trig_table:
+            flags |= FLAG_TRIG_TABLE
+        if config.entity_store:
+            flags |= FLAG_ENTITY_STORE
+
+        super().__init__(game.seed, config.num_players, config.target_fps, game.num_rocks,
+                         config.replay_checksum_interval, flags)
+
+    # Add the parm input mask for the tick that parm game has just done.
+    def record_tick(self, game, inputs):
+        if self.runs and self.runs[-1][0] == inputs and self.runs[-1][1] < MAX_RUN:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([inputs, 1])
+
+        self.ticks += 1
+        if self.ticks % self.checksum_interval == 0:
+            self.checksums.append(game.state_checksum())
+
+
+# Re-simulate parm replay headlessly, as fast as the CPU allows.
+# Returns (tick of first divergence or None, ticks per second).
+def resimulate(this_replay):
+    import space_rocks                      # Imported here, because space_rocks imports this module.
+
+    config = space_rocks.Config(False, this_replay.target_fps, headless=True)
+    config.num_players = this_replay.num_players
+    config.num_rocks = this_replay.num_rocks
+    config.entity_store = bool(this_replay.flags & FLAG_ENTITY_STORE)
+    config.demo_mode = False
+    config.monochrome = False
+
+    # The trig table setting is global, so it is put back afterwards, for any other games run in this process.
+    old_use_trig_table = cc.use_trig_table
+    cc.use_trig_table = bool(this_replay.flags & FLAG_TRIG_TABLE)
+    try:
+        game = space_rocks.Game(config, this_replay.seed)
+
+        diverged_at = None
+        checksum_num = 0
+        start_time = time.perf_counter()
+        for inputs in this_replay.inputs():
+            game.simulate_1_tick(inputs)
+
+            if game.tick_count % this_replay.checksum_interval == 0:
+                if game.state_checksum() != this_replay.checksums[checksum_num] and diverged_at is None:
+                    diverged_at = game.tick_count
+                checksum_num += 1
+        elapsed = time.perf_counter() - start_time
+    finally:
+        cc.use_trig_table = old_use_trig_table
+
+    ticks_per_second = 0
+    if elapsed > 0:
+        ticks_per_second = this_replay.ticks / elapsed
+    return diverged_at, ticks_per_second
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-simulate a recorded Space Rocks game, and check it matches.')
+    parser.add_argument('filename', help='Replay file to re-simulate.')
+    args = parser.parse_args()
+
+    this_replay = Replay.load(args.filename)
+    print('Seed =', this_replay.seed, ' Players =', this_replay.num_players, ' Ticks =', this_replay.ticks,
+          ' Runs of inputs =', len(this_replay.runs), ' Checksums =', len(this_replay.checksums))
+
+    (diverged_at, ticks_per_second) = resimulate(this_replay)
+    print('Ticks per second =', round(ticks_per_second),
+          ' Times faster than real time =', round(ticks_per_second / this_replay.target_fps, 1))
+
+    if diverged_at is None:
+        print('Replay matches the original game.')
+    else:
+        print('Replay diverged from the original game, by tick', diverged_at)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# Library of rock shapes.
+#
+# Rather than every new rock making its own random polygon, a library of shapes for each size of rock is made once, when
+# the game starts up. Each rock just refers to one of the shapes in the library, which it shares with the other rocks
+# of that shape. So making a rock is a couple of random numbers, and the rocks of a game only need as many vertex
+# lists and arrays as there are shapes in the library.
+#
+# Rocks that share a shape also share their sprites in the sprite cache.
+#
+# The library is made from its own fixed seed, so it comes out the same every time, and replays stay replayable.
+
+import random
+
+import numpy as np
+
+import cartesian_coordinates as cc
+
+SIZES = ['Large', 'Medium', 'Small']
+
+
+# One rock shape. Its vertices are centred around the origin, not rotated.
+class RockShape:
+
+    # Parm rng is the random number generator that the shape and colour are made from.
+    def __init__(self, shape_id, size, rng):
+        assert size in SIZES
+
+        self.shape_id = shape_id                            # Unique ID number, so sprites can be found in the cache.
+        self.size = size                                    # Size of rock, "Large", "Medium", "Small".
+        self.vertices = []                                  # List of vertices of the rock, centered around origin.
+
+        # Rock is based on a polygon (straight edged circle).
+        if self.size == 'Large':
+            self.radius = rng.randint(30, 50)
+        elif self.size == "Medium":
+            self.radius = rng.randint(15, 25)
+        else:
+            self.radius = rng.randint(10, 15)
+
+        vertex_count = 12                                   # Number of vertices that will make up this rock.
+        slice_size = 360 / vertex_count                     # Good for this to be an integer.
+
+        for v_num in range(vertex_count):
+            if self.size == "Large":
+                vertex = [0, self.radius + rng.randint(-15, 15)]
+            elif self.size == "Medium":
+                vertex = [0, self.radius + rng.randint(-7, 7)]
+            else:
+                vertex = [0, self.radius + rng.randint(-5, 5)]
+
+            vertex = cc.rotate_around_origin(vertex, slice_size * v_num)
+            self.vertices.append(vertex)
+
+        self.vertex_array = np.array(self.vertices)         # Same vertices, so they can be transformed as a batch.
+        self.max_radius = float(np.hypot(self.vertex_array[:, 0], self.vertex_array[:, 1]).max())  # Furthest vertex.
+
+        self.colour = (rng.randint(60, 200), rng.randint(60, 200), rng.randint(60, 200))
+
+
+class RockShapeLibrary:
+
+    # Make parm shapes_per_size shapes for each size of rock, from parm seed.
+    def __init__(self, shapes_per_size=32, seed=0):
+        rng = random.Random(seed)
+        self.shapes = {}                                    # Key is size of rock, value is list of shapes.
+        shape_id = 0
+        for size in SIZES:
+            self.shapes[size] = []
+            for s in range(shapes_per_size):
+                self.shapes[size].append(RockShape(shape_id, size, rng))
+                shape_id += 1
+
+    # Shape number parm index of the rocks of parm size.
+    def shape(self, size, index):
+        return self.shapes[size][index]
+
+    # Choose one of the shapes for rocks of parm size, with parm rng.
+    def random_shape(self, size, rng):
+        shapes = self.shapes[size]
+        return shapes[rng.randrange(len(shapes))]
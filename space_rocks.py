@@ -1,16 +1,53 @@
 # Space Rocks game.
 
 import cartesian_coordinates as cc      # Functions for rotating, scaling, etc.
+import replay                           # Recording of games, so that they can be re-simulated later.
+import spatial_hash                     # Broad phase of collision detection.
+import entity_store                     # Optional struct-of-arrays storage for rocks and bullets.
+import sprite_cache                     # Pre-rendered rock sprites.
+import text_cache                       # Pre-rendered text.
+import profiler                         # Timing of each phase of each frame.
+import logger                           # Buffered logging, written out by a background thread.
+import capture                          # Screenshots, saved by a background thread.
+import asset_manager                    # Fonts and sounds, loaded by a background thread.
+import particles                        # Explosion particles.
+import quality                          # Turns drawing detail down when frames take too long.
+import rock_shapes                      # Shapes shared by rocks.
 import pygame                           # 2d games engine.
+import numpy as np                      # Arrays of vertices, so that they can be transformed in one go.
 import random
 import time
-import datetime                         # Needed for logging.
+import datetime                         # Needed for naming replays.
+import itertools
+import os
+import zlib                             # For the CRC32 checksum of the game state.
 
 
-# If debugging is turned on, send the parm message to stdout.
-def trace(config, message):
+# Counts of how often the world-space vertices of rocks and ships were reused from cache, or had to be recalculated.
+world_cache_stats = {'hits': 0, 'recomputes': 0}
+
+# Bits of the input mask. Each tick, the controls held down by the players are packed into one small number. That is
+# all that a replay needs to record, as everything else in the game follows from the seed.
+P1_ANTICLOCKWISE = 1
+P1_CLOCKWISE = 2
+P1_FIRE = 4
+P2_ANTICLOCKWISE = 8
+P2_CLOCKWISE = 16
+P2_FIRE = 32
+
+
+# Return one rectangle that covers all of the parm list of rectangles. Returns None if the list is empty.
+def union_rects(rects):
+    if not rects:
+        return None
+    return rects[0].unionall(rects[1:])
+
+
+# If debugging is turned on, log the parm message. It is formatted later, by the logger's writer thread, as
+# message % args. So when debugging is off, no message is ever built.
+def trace(config, message, *args):
     if config.debug:
-        print(datetime.datetime.now(), message)
+        config.logger.log(message, *args)
 
 
 ############################################
@@ -19,85 +56,96 @@ def trace(config, message):
 
 class Rock:
 
-    def __init__(self, config, size):
+    # Slots rather than a dict for each rock's values, so that thousands of rocks don't take up much memory.
+    __slots__ = ['size', 'shape', 'coords', 'prev_coords', 'drift', 'rotation', 'prev_rotation', 'rotation_speed',
+                 'world_vertex_cache', 'kill', 'collision', 'exploding', 'explosion_step']
+
+    # Parm rng is the random number generator used to choose the rock's shape and spin. Games pass in their own seeded
+    # generator.
+    def __init__(self, config, size, rng=random):
         assert size in ['Small', 'Medium', 'Large']
 
         self.size = size                                    # Size of rock to be created, "Large", "Medium", "Small"
-        self.vertices = []                                  # List of vertices of the rock, centered around origin.
-
-        # Rock is based on a polygon (straight edged circle).
-        if self.size == 'Large':
-            self.radius = random.randint(30, 50)
-        elif self.size == "Medium":
-            self.radius = random.randint(15, 25)
-        else:
-            self.radius = random.randint(10, 15)
+        self.shape = config.rock_shapes.random_shape(size, rng)     # Vertices, colour, etc. shared with other rocks.
 
         self.rotation = 0                                   # Current rotation of the rock in degrees.
+        self.prev_coords = None                             # Coords before the last move. None = hasn't moved yet.
+        self.prev_rotation = 0                              # Rotation before the last move.
 
         max_rotation_velocity = round(100 / config.target_fps)
-        self.rotation_speed = random.randint(- max_rotation_velocity, max_rotation_velocity) # Degrees per tick
+        self.rotation_speed = rng.randint(- max_rotation_velocity, max_rotation_velocity) # Degrees per tick
         if self.rotation_speed == 0:                        # No rotation would look boring.
             self.rotation_speed = 1
 
-        vertex_count = 12                                   # Number of vertices that will make up this rock.
-        slice_size = 360 / vertex_count                     # Good for this to be an integer.
-
-        for v_num in range(vertex_count):
-            if self.size == "Large":
-                vertex = [0, self.radius + random.randint(-15, 15)]
-            elif self.size == "Medium":
-                vertex = [0, self.radius + random.randint(-7, 7)]
-            else:
-                vertex = [0, self.radius + random.randint(-5, 5)]
-
-            vertex = cc.rotate_around_origin(vertex, slice_size * v_num)
-            self.vertices.append(vertex)
+        self.world_vertex_cache = None                      # Vertices in game screen coords. None = need recalculating.
 
         self.kill = False                                   # Should this rock be killed off?
         self.collision = False                              # Has the rock collided with something?
         self.exploding = False                              # Is the rock in the process of exploding?
         self.explosion_step = 0                             # Current step of explosion animation.
 
-        self.colour = (random.randint(60, 200), random.randint(60, 200), random.randint(60, 200))
+        trace(config, '%s rock created.', self.size)         # Send trace info to the log.
+
+    # The rock's vertices, colour, etc. come from its shape, which is shared with other rocks.
+    @property
+    def vertices(self):
+        return self.shape.vertices
+
+    @property
+    def vertex_array(self):
+        return self.shape.vertex_array
+
+    @property
+    def radius(self):
+        return self.shape.radius
 
-        trace(config, self.size + ' rock created.')           # Send trace info to stdout.
+    @property
+    def max_radius(self):
+        return self.shape.max_radius
 
-    def place_on_side_of_screen(self, config):
+    @property
+    def colour(self):
+        return self.shape.colour
 
-        start_side = random.randint(1, 4)                   # 1=Top, 2=Bottom, 3=Left, 4=Right
+    @property
+    def shape_id(self):
+        return self.shape.shape_id
+
+    def place_on_side_of_screen(self, config, rng=random):
+
+        start_side = rng.randint(1, 4)                   # 1=Top, 2=Bottom, 3=Left, 4=Right
         assert start_side in [1, 2, 3, 4]
 
         if start_side == 1:                                 # From the top of screen.
             # TODO Try simplifying the first two in same style as second two.
 
-            self.coords = [random.randint(config.border, config.screen_size[0] - config.border), config.top_dead]
+            self.coords = [rng.randint(config.border, config.screen_size[0] - config.border), config.top_dead]
 
             if self.coords[0] <= config.screen_size[0] / 2:    # Left hand side of top of screen.
-                self.drift = [10 * random.randint(1, 3) / config.target_fps,
-                              10 * random.randint(2, 4) / config.target_fps]   # So drift rightwards and downwards.
+                self.drift = [10 * rng.randint(1, 3) / config.target_fps,
+                              10 * rng.randint(2, 4) / config.target_fps]   # So drift rightwards and downwards.
             else:
-                self.drift = [10 * random.randint(-3, -1) / config.target_fps,
-                              10 * random.randint(2, 4) / config.target_fps]     # Otherwise drift leftwards and downwards.
+                self.drift = [10 * rng.randint(-3, -1) / config.target_fps,
+                              10 * rng.randint(2, 4) / config.target_fps]     # Otherwise drift leftwards and downwards.
 
         if start_side == 2:                                 # Bottom
-            self.coords = [random.randint(config.border, config.screen_size[0] - config.border), config.bottom_dead]
+            self.coords = [rng.randint(config.border, config.screen_size[0] - config.border), config.bottom_dead]
 
             if self.coords[0] <= config.screen_size[0] / 2:    # Left hand side of top of screen.
-                self.drift = [10 * random.randint(1, 3) / config.target_fps,
-                              10 * random.randint(-4, -2) / config.target_fps]   # So drift rightwards and upwards.
+                self.drift = [10 * rng.randint(1, 3) / config.target_fps,
+                              10 * rng.randint(-4, -2) / config.target_fps]   # So drift rightwards and upwards.
             else:
-                self.drift = [random.randint(-3, -1), random.randint(-4, -2)]     # Otherwise drift leftwards and upwards.
+                self.drift = [rng.randint(-3, -1), rng.randint(-4, -2)]     # Otherwise drift leftwards and upwards.
 
         if start_side == 3:
-            self.coords = [-100, random.randint(200, 400)]
-            self.drift = [10 * random.randint(2, 4) / config.target_fps,
-                          10 * random.randint(-3, 3) / config.target_fps]
+            self.coords = [-100, rng.randint(200, 400)]
+            self.drift = [10 * rng.randint(2, 4) / config.target_fps,
+                          10 * rng.randint(-3, 3) / config.target_fps]
 
         if start_side == 4:
-            self.coords = [900, random.randint(200, 400)]
-            self.drift = [10 * random.randint(-4, -2) / config.target_fps,
-                          10 * random.randint(-3, 3) / config.target_fps]
+            self.coords = [900, rng.randint(200, 400)]
+            self.drift = [10 * rng.randint(-4, -2) / config.target_fps,
+                          10 * rng.randint(-3, 3) / config.target_fps]
 
     # Has the rock strayed outside of the game screen? If so, it is flagged to be killed off.
     def check_onscreen(self, config):
@@ -110,34 +158,66 @@ class Rock:
     # Is the parm vertex inside the rock?
     def check_collision(self, vertex):
         # TODO Try omitting this line of code, as this attribute was set to False when object created.
-        self.collision = False                      # Start by assuming that vertex is outside all triangles.
-
-        # Before doing the triangle analysis (which is time consuming), do a simpler clipping test.
-        # Imagine a square around the centre of the rock. Is the vertex inside that square?
-        if (vertex[0] > self.coords[0] - self.radius - 15       # 15 is the most that can randomly be added to a vertex
-        and vertex[0] < self.coords[0] + self.radius + 15       # at the time that the rock was created.
-        and vertex[1] > self.coords[1] - self.radius - 15
-        and vertex[1] < self.coords[1] + self.radius + 15):
-
-            # If the vertex is inside the square, then it is worth checking each triangle that makes up the
-            # rock in turn, to see if the vertex is inside any of them.
-            prev_vertex = self.vertices[-1]  # This is so we have 3 points for first triangle.
-
-            for triangle_vertex in self.vertices:
-                if cc.is_inside_triangle(vertex, self.position(prev_vertex), self.position(triangle_vertex), self.coords):
-                    self.collision = True
-                prev_vertex = triangle_vertex
-
-    # Apply some transformations to calculate the coordinates of the rock's parm vertex on the game screen.
-    def position(self, vertex):
-        rotated = cc.rotate_around_origin(vertex, self.rotation)
-        return cc.translation(rotated, self.coords)
-
-    # Begin the process of exploding this rock.
-    def explode(self, config):
+        self.collision = False                      # Start by assuming that vertex is outside the rock.
+
+        # Before doing the polygon test, do a simpler clipping test. Is the vertex any nearer to the centre of the rock
+        # than the rock's furthest vertex?
+        if cc.is_inside_circle(vertex, self.coords, self.max_radius):
+
+            # If it is, then it is worth checking whether the vertex is inside the rock's outline.
+            self.collision = cc.is_inside_polygon(vertex, self.world_vertices())
+
+    # Did the path of a bullet, from parm start to parm end, hit this rock? If it did, returns how far along the path
+    # the bullet hit it, from 0 to 1. If not, returns None.
+    def check_path_collision(self, start, end):
+        if cc.is_segment_near_circle(start, end, self.coords, self.max_radius):
+            return cc.segment_hits_polygon(start, end, self.world_vertices())
+        return None
+
+    # Game screen coordinates of all of the parm vertices, as an (N, 2) array. Defaults to the rock's own vertices, at
+    # its current rotation and coords.
+    def positions(self, vertices=None, rotation=None, coords=None):
+        if vertices is None:
+            vertices = self.vertex_array
+        if rotation is None:
+            rotation = self.rotation
+        if coords is None:
+            coords = self.coords
+        rotated = cc.batch_rotate_around_origin(vertices, rotation)
+        return cc.batch_translation(rotated, coords)
+
+    # Coords and rotation of the rock parm alpha of the way through the current tick, for drawing. Alpha 0 is where
+    # the rock was before its last move, and alpha 1 is where it is now.
+    def interpolated(self, alpha):
+        if alpha >= 1 or self.prev_coords is None:
+            return self.coords, self.rotation
+        return (cc.interpolate(self.prev_coords, self.coords, alpha),
+                round(self.prev_rotation + (self.rotation - self.prev_rotation) * alpha))
+
+    # List of the rock's vertices in game screen coords. As they only change when the rock moves, they are calculated
+    # at most once per tick, and then shared by collision detection and drawing.
+    def world_vertices(self):
+        if self.world_vertex_cache is None:
+            self.world_vertex_cache = self.positions().tolist()
+            world_cache_stats['recomputes'] += 1
+        else:
+            world_cache_stats['hits'] += 1
+        return self.world_vertex_cache
+
+    # Begin the process of exploding this rock. If there is a parm particle system, the explosion is added to it.
+    def explode(self, config, particle_system=None):
         self.exploding = True                               # Flag it as exploding.
         config.explosion_channel.play(config.explosion_sound)   # Play explosion sound.
 
+        if particle_system is not None:
+            # Particles fly out from the rock's vertices, getting 5 times as far from its centre as the vertices were,
+            # by the end of the explosion. Higher FPS mean more explosion steps, so lower speed per step.
+            # The rock's drift is added on, so that the debris carries on moving the way that the rock was going.
+            vertices = self.vertex_array[::config.particle_step]
+            velocities = cc.batch_scale(cc.batch_rotate_around_origin(vertices, self.rotation), 5 / config.target_fps)
+            velocities = particles.spread(velocities, config.particles_per_vertex) + self.drift
+            particle_system.emit(self.coords, velocities, config.target_fps, self.colour)
+
     # Continue animation of rock's explosion.
     def animate_explosion(self, game):
         if self.explosion_step < game.config.target_fps:           # Higher FPS mean, more animation steps for explosion!
@@ -147,66 +227,155 @@ class Rock:
 
         # Half way through the explosion animation, maybe spawn new rocks.
         if self.explosion_step == int(0.5 * game.config.target_fps):
-            if self.size in ['Large', 'Medium']:
-                for i in range(2):                          # range(2), because 2 child rocks will be created.
-                    if self.size == 'Large':
-                        new_rock = Rock(game.config, 'Medium')
-                    else:
-                        new_rock = Rock(game.config, 'Small')
+            self.spawn_children(game)
+
+    # If this rock is big enough, break it into 2 smaller child rocks.
+    def spawn_children(self, game):
+        if self.size in ['Large', 'Medium']:
+            for i in range(2):                              # range(2), because 2 child rocks will be created.
+                if self.size == 'Large':
+                    new_rock = game.new_rock('Medium')
+                else:
+                    new_rock = game.new_rock('Small')
 
-                    # Give it position that is near it's parent.
-                    new_rock.coords = cc.translation(self.coords, [random.randint(-25, 25), random.randint(-25, 25)])
+                # Give it position that is near it's parent.
+                new_rock.coords = cc.translation(self.coords,
+                                                 [game.random.randint(-25, 25), game.random.randint(-25, 25)])
 
-                    # New rocks's drift will be similar to parent.
-                    # TODO I think this is cause of some child rocks being stationary...
-                    # TODO Need to add some check 'if near to zero, then set to 1'
-                    new_drift_x = self.drift[0] + 10 * random.randint(-1, 1) / game.config.target_fps
-                    new_drist_y = self.drift[1] + 10 * random.randint(-1, 1) / game.config.target_fps
+                # New rocks's drift will be similar to parent.
+                # TODO I think this is cause of some child rocks being stationary...
+                # TODO Need to add some check 'if near to zero, then set to 1'
+                new_drift_x = self.drift[0] + 10 * game.random.randint(-1, 1) / game.config.target_fps
+                new_drist_y = self.drift[1] + 10 * game.random.randint(-1, 1) / game.config.target_fps
 
-                    new_rock.drift = [new_drift_x, new_drist_y]
+                new_rock.drift = [new_drift_x, new_drist_y]
 
-                    game.rocks.append(new_rock)             # Add the new rocks to the game.
+                game.rocks.append(new_rock)                 # Add the new rocks to the game.
 
-    # Draw this rock on game screen.
-    def draw(self, config):
+    # Draw this rock on game screen, parm alpha of the way through the current tick.
+    # Returns the rectangle of the screen that has been drawn on.
+    def draw(self, config, alpha=1):
         # TODO Make the normal rock display, and exploding rock display be separate methods.
 
-        prev_vertex = self.vertices[-1]                     # This will make it a complete polygon.
+        drawn = []                                          # Rectangles of the screen that have been drawn on.
+        (coords, rotation) = self.interpolated(alpha)
+
+        if not self.exploding and config.use_sprite_cache:
+            # Rotation is always a whole number of degrees, so there are at most 360 different sprites for each rock.
+            angle = int(rotation) % 360
+            if config.monochrome:
+                key = (self.shape_id, angle, None, config.rock_vertex_step)
+            else:
+                key = (self.shape_id, angle, tuple(self.colour), config.rock_vertex_step)
+            sprite = config.sprite_cache.get(key, lambda: self.render_sprite(config, angle))
+
+            half_size = sprite.get_width() // 2             # Rock's centre is in the middle of the sprite.
+            return config.screen.blit(sprite, (round(coords[0]) - half_size, round(coords[1]) - half_size))
+
+        elif not self.exploding:
+            if alpha >= 1:
+                world_vertices = self.world_vertices()
+            else:
+                world_vertices = self.positions(None, rotation, coords).tolist()
+            world_vertices = world_vertices[::config.rock_vertex_step]
+            prev_vertex = world_vertices[-1]                # This will make it a complete polygon.
 
-        for vertex in self.vertices:
-            if not self.exploding:
+            for vertex in world_vertices:
                 if config.monochrome:
-                    pygame.draw.line(config.screen, config.WHITE, self.position(prev_vertex), self.position(vertex), 1)
+                    drawn.append(pygame.draw.line(config.screen, config.WHITE, prev_vertex, vertex, 1))
 
                 # TODO Refactor to draw whole polygon in one go, rather than drawing a number of triangles.
                 else:
-                    triangle = []
-                    triangle.append(self.position(prev_vertex))
-                    triangle.append(self.position(vertex))
-                    triangle.append(self.coords)
-                    pygame.draw.polygon(config.screen, self.colour, triangle, 0)
+                    drawn.append(pygame.draw.polygon(config.screen, self.colour, [prev_vertex, vertex, coords], 0))
 
-            else:
-                # Higher FPS mean more explosion steps, so lower speed of explosion per step.
-                scaled_vertex = cc.scale(vertex, 5 * self.explosion_step / config.target_fps)
-                [x, y] = self.position(scaled_vertex)
+                prev_vertex = vertex
 
-                # TODO Use the function in cartesian coordinate package to make coords integers.
+        elif config.use_particles:
+            return None                                     # The explosion is drawn by the particle system.
+
+        else:
+            # Higher FPS mean more explosion steps, so lower speed of explosion per step.
+            scaled_vertices = cc.batch_scale(self.vertex_array, 5 * self.explosion_step / config.target_fps)
+            particles = cc.batch_integer_coord(self.positions(scaled_vertices, rotation, coords)).tolist()
+
+            for particle in particles:
                 if config.monochrome:
-                    pygame.draw.circle(config.screen, config.WHITE, [int(x), int(y)], 1, 1)
+                    drawn.append(pygame.draw.circle(config.screen, config.WHITE, particle, 1, 1))
                 else:
-                    pygame.draw.circle(config.screen, self.colour, [int(x), int(y)], 4, 4)
+                    drawn.append(pygame.draw.circle(config.screen, self.colour, particle, 4, 4))
 
                 # TODO Make the ship explosion particle randomly twinkle away.
                 # if random.randint(1, 25) == 10:
                 #     self.explosion_vertices.remove(v)
 
-            prev_vertex = vertex
+        return union_rects(drawn)
+
+    # Render the rock, rotated by parm angle, onto a sprite with a transparent background. The centre of the rock is in
+    # the middle of the sprite.
+    def render_sprite(self, config, angle):
+        rotated = cc.batch_rotate_around_origin(self.vertex_array[::config.rock_vertex_step], angle)
+        half_size = int(np.abs(rotated).max()) + 2
+        sprite = pygame.Surface((2 * half_size, 2 * half_size))
+
+        outline = cc.batch_translation(rotated, [half_size, half_size]).tolist()
+        if config.monochrome:
+            pygame.draw.polygon(sprite, config.WHITE, outline, 1)
+        else:
+            pygame.draw.polygon(sprite, self.colour, outline, 0)
 
-    # Move the rock by one tick.
+        # Black is see-through. Run length encoding makes blits of sprites that are mostly see-through much faster.
+        sprite.set_colorkey(config.BLACK, pygame.RLEACCEL)
+        return sprite
+
+    # Move the rock by one tick. The rock has two coords lists, which are swapped over each move and then changed in
+    # place, so no new lists are made.
     def move(self):
+        if self.prev_coords is None:
+            self.prev_coords = [0, 0]
+        (self.prev_coords, self.coords) = (self.coords, self.prev_coords)
+        self.coords[0] = self.prev_coords[0] + self.drift[0]
+        self.coords[1] = self.prev_coords[1] + self.drift[1]
+        self.prev_rotation = self.rotation
         self.rotation += self.rotation_speed
-        self.coords = cc.translation(self.coords, self.drift)
+        self.world_vertex_cache = None                      # Rock has moved, so its vertices need recalculating.
+
+
+# A rock whose coords, drift, rotation, flags, etc. are kept in a row of an EntityStore, rather than in the object.
+class StoredRock(Rock):
+
+    __slots__ = ['store', 'slot', 'cache_move_count']
+
+    coords = entity_store.array_property('coords', 'prev_coords')
+    drift = entity_store.array_property('drift')
+    rotation = entity_store.array_property('rotation', 'prev_rotation')
+    rotation_speed = entity_store.array_property('rotation_speed')
+    radius = entity_store.array_property('radius')
+    max_radius = entity_store.array_property('max_radius')
+    kill = entity_store.array_property('kill')
+    exploding = entity_store.array_property('exploding')
+    explosion_step = entity_store.array_property('explosion_step')
+
+    def __init__(self, store, config, size, rng=random):
+        self.store = store
+        self.slot = store.add(self)                     # Must have a row before Rock.__init__ sets any values.
+        self.cache_move_count = store.move_count        # Value of store's move_count when vertex cache was filled.
+        super().__init__(config, size, rng)
+        self.radius = self.shape.radius                 # So that the store can test every rock in one go.
+        self.max_radius = self.shape.max_radius
+
+    # The store moves all of its rocks in one go, so the vertex cache is emptied here if the store has moved them.
+    def world_vertices(self):
+        if self.cache_move_count != self.store.move_count:
+            self.world_vertex_cache = None
+            self.cache_move_count = self.store.move_count
+        return super().world_vertices()
+
+    def interpolated(self, alpha):
+        if alpha >= 1:
+            return self.coords, self.rotation
+        prev_rotation = self.store.prev_rotation[self.slot]
+        return (cc.interpolate(self.store.prev_coords[self.slot], self.coords, alpha),
+                round(prev_rotation + (self.rotation - prev_rotation) * alpha))
 
 
 ############################################
@@ -214,25 +383,45 @@ class Rock:
 ############################################
 
 class Bullet:
-    def __init__(self, origin, angle, colour):
 
-        self.coords = origin                                        # Current [x, y] coordinates of the bullet.
+    __slots__ = ['coords', 'prev_coords', 'angle', 'colour', 'drift', 'kill', 'in_flight']
+
+    # Parm speed is the number of pixels that the bullet moves each tick.
+    def __init__(self, origin, angle, colour, speed=20):
+
+        self.coords = list(origin)                                  # Current [x, y] coordinates of the bullet.
+        self.prev_coords = list(origin)                             # Coordinates before the last move.
         self.angle = angle                                          # Angle that the bullet is moving in.
         self.colour = colour                                        # Colour of bullet. Will be same as player's ship.
 
-        self.drift = cc.rotate_around_origin([0, 20], self.angle)   # Incremental drift this bullet will do each tick.
+        self.drift = cc.rotate_around_origin([0, speed], self.angle)  # Incremental drift this bullet does each tick.
         self.kill = False                                           # Flags is this bullet is to be deleted.
 
-    # Draw the bullet as a little circle on the game screen.
-    def draw(self, config):
+    # Draw the bullet as a little circle on the game screen, parm alpha of the way through the current tick.
+    # Returns the rectangle of the screen that has been drawn on.
+    def draw(self, config, alpha=1):
+        coords = cc.integer_coord(cc.interpolate(self.prev_coords, self.coords, alpha))
         if config.monochrome:
-            pygame.draw.circle(config.screen, config.WHITE, cc.integer_coord(self.coords), 1, 1)
+            return pygame.draw.circle(config.screen, config.WHITE, coords, 1, 1)
         else:
-            pygame.draw.circle(config.screen, self.colour, cc.integer_coord(self.coords), 2, 2)
-
-    # Move the bullet by one tick.
+            return pygame.draw.circle(config.screen, self.colour, coords, 2, 2)
+
+    # Reuse this bullet, by firing it from parm origin. Parm drift is the amount it will move each tick.
+    # The coords are copied into the bullet's own lists, rather than making new ones.
+    def launch(self, origin, drift):
+        self.coords[0] = origin[0]
+        self.coords[1] = origin[1]
+        self.prev_coords[0] = origin[0]
+        self.prev_coords[1] = origin[1]
+        self.drift = drift
+        self.kill = False
+
+    # Move the bullet by one tick. Coords are changed in place, so no new lists are made.
     def move(self):
-        self.coords = cc.translation(self.coords, self.drift)
+        self.prev_coords[0] = self.coords[0]
+        self.prev_coords[1] = self.coords[1]
+        self.coords[0] += self.drift[0]
+        self.coords[1] += self.drift[1]
 
     # Is the bullet still onscreen? If not, flag it to be killed.
     def check_onscreen(self, config):
@@ -243,18 +432,107 @@ class Bullet:
             self.kill = True
 
 
+# A bullet whose coords, drift and kill flag are kept in a row of an EntityStore.
+class StoredBullet(Bullet):
+
+    __slots__ = ['store', 'slot']
+
+    coords = entity_store.array_property('coords', 'prev_coords')
+    prev_coords = entity_store.array_property('prev_coords')
+    drift = entity_store.array_property('drift')
+    kill = entity_store.array_property('kill')
+
+    def __init__(self, store, origin, angle, colour, speed=20):
+        self.store = store
+        self.slot = store.add(self)
+        super().__init__(origin, angle, colour, speed)
+
+    # A reused bullet needs a new row in the store, as its old row was freed when it was killed.
+    def launch(self, origin, drift):
+        self.slot = self.store.add(self)
+        super().launch(origin, drift)
+
+
+# Each ship has a fixed number of bullets, that are made when the ship is made and then reused, rather than making a
+# new bullet for every shot. The bullets are kept in a ring. Bullets tend to die in the order that they were fired, so
+# the next bullet round the ring is nearly always free to be fired.
+class BulletPool:
+
+    def __init__(self, capacity, colour, bullet_store=None):
+        self.ring = []                                      # All of the pool's bullets, fired or not.
+        for b in range(capacity):
+            if bullet_store is None:
+                bullet = Bullet([0, 0], 0, colour)
+            else:
+                bullet = StoredBullet(bullet_store, [0, 0], 0, colour)
+                bullet_store.remove(bullet.slot)            # Doesn't need a row in the store until it is fired.
+            bullet.in_flight = False
+            self.ring.append(bullet)
+
+        self.bullet_store = bullet_store
+        self.next_bullet = 0                                # Position in the ring of the next bullet to fire.
+        self.in_flight = []                                 # Bullets that have been fired, oldest first.
+
+    # Fire the next free bullet from parm origin, with parm drift. Returns False if all of the bullets are in flight.
+    def fire(self, origin, drift):
+        if len(self.in_flight) == len(self.ring):
+            return False
+
+        while self.ring[self.next_bullet].in_flight:
+            self.next_bullet = (self.next_bullet + 1) % len(self.ring)
+
+        bullet = self.ring[self.next_bullet]
+        bullet.launch(origin, drift)
+        bullet.in_flight = True
+        self.in_flight.append(bullet)
+        self.next_bullet = (self.next_bullet + 1) % len(self.ring)
+        return True
+
+    # Return the bullets that have been flagged to be killed to the pool. The list of bullets in flight is changed in
+    # place, so anything looking at it sees the change.
+    def remove_dead(self):
+        live_count = 0
+        for bullet in self.in_flight:
+            if bullet.kill:
+                bullet.in_flight = False
+                if self.bullet_store is not None:
+                    self.bullet_store.remove(bullet.slot)   # Swap the last row of the store into this one.
+            else:
+                self.in_flight[live_count] = bullet
+                live_count += 1
+        del self.in_flight[live_count:]
+
+
+# Drift of a bullet moving at parm speed, for each of the 36 headings that a ship can point in. Worked out once for
+# each speed, and shared by all of the bullets.
+bullet_drift_tables = {}
+
+
+def bullet_drifts(speed):
+    if speed not in bullet_drift_tables:
+        bullet_drift_tables[speed] = [cc.rotate_around_origin([0, speed], heading) for heading in range(0, 360, 10)]
+    return bullet_drift_tables[speed]
+
+
 ############################################
 # SPACE SHIP
 ############################################
 
 class SpaceShip:
 
-    def __init__(self, origin, colour):
+    __slots__ = ['coords', 'colour', 'bullet_store', 'rotation', 'prev_rotation', 'exploding', 'explosion_step', 'kill',
+                 'remaining_invincibility_ticks', 'vertices', 'explosion_vertices', 'vertex_array', 'world_vertex_cache',
+                 'bullet_pool', 'bullets']
+
+
+    def __init__(self, origin, colour, bullet_store=None, rng=random):
 
         self.coords = origin                                        # Starting location of ship is parm origin.
         self.colour = colour                                        # Colour of the ship.
+        self.bullet_store = bullet_store                            # If not None, EntityStore for ship's bullets.
 
         self.rotation = 0                                           # Direction that ship is pointing. In degrees.
+        self.prev_rotation = 0                                      # Direction it was pointing at end of last tick.
         self.exploding = False                                      # Is the ship exploding?
         self.explosion_step = 0                                     # Current step in explosion animation.
         self.kill = False                                           # Is the ship flagged to be deleted?
@@ -268,77 +546,122 @@ class SpaceShip:
         self.explosion_vertices = []
 
         for v_num in range(explosion_vertex_count):
-            vertex = [0, 7.0 + random.randint(-2, 2)]
+            vertex = [0, 7.0 + rng.randint(-2, 2)]
 
             vertex = cc.rotate_around_origin(vertex, slice_size * v_num)
             self.explosion_vertices.append(vertex)
 
-        self.bullets = []                       # Bullets in flight will be appended to this list when they are fired.
+        # Keep explosion and ship vertices as arrays, so that they can be transformed in one go.
+        self.explosion_vertices = np.array(self.explosion_vertices)
+        self.vertex_array = np.array(self.vertices)
+        self.world_vertex_cache = None              # Vertices in game screen coords. None = need recalculating.
+
+        # Bullets in flight. This is the pool's list, so it changes as bullets are fired and killed.
+        self.bullet_pool = BulletPool(self.max_bullets, colour, bullet_store)
+        self.bullets = self.bullet_pool.in_flight
+
+    max_bullets = 10                            # Most bullets that a ship can have in flight at once.
 
     # Rotate the ship clockwise by 10 degrees.
     def rotate_clockwise(self):
         if not self.exploding:              # Exploding ships can't rotate!
             self.rotation -= 10             # In Pygame, increased y coord is down, hence this rotation is -ve.
+            self.world_vertex_cache = None
 
     # Rotate the ship anticlockwise by 10 degrees.
     def rotate_anticlockwise(self):
         if not self.exploding:              # Exploding ships can't rotate!
             self.rotation += 10            # In Pygame, increased y coord is down, hence this rotation is +ve.
+            self.world_vertex_cache = None
 
     # If ship is not currently exploding, then fire a bullet from its nose.
     def fire_bullet(self, config):
-        if len(self.bullets) < 10 and not self.exploding:
+        if len(self.bullets) < self.max_bullets and not self.exploding:
             # Bullets should originate from the ships nose.
             # Vertex 0 of the ship is it's nose.
-            ship_nose = self.position(self.vertices[0])
-            self.bullets.append(Bullet(ship_nose, self.rotation, self.colour))
+            ship_nose = self.world_vertices()[0]
+            speed = config.bullet_speed / config.target_fps         # Same speed on screen, whatever the tick rate.
+            if self.rotation % 10 == 0:                             # Ships always point in multiples of 10 degrees.
+                drift = bullet_drifts(speed)[int(self.rotation % 360) // 10]
+            else:
+                drift = cc.rotate_around_origin([0, speed], self.rotation)
+            self.bullet_pool.fire(ship_nose, drift)
 
             config.laser_channel.play(config.laser_sound)
 
-    # Calculate position of parm ship vertex in game screen coordinates.
-    def position(self, vertex):
-        rotated = cc.rotate_around_origin(vertex, self.rotation)
-        return cc.translation(rotated, self.coords)
+    # Game screen coordinates of all of the ship's vertices, as an (N, 2) array. Defaults to the current rotation.
+    def positions(self, rotation=None):
+        if rotation is None:
+            rotation = self.rotation
+        rotated = cc.batch_rotate_around_origin(self.vertex_array, rotation)
+        return cc.batch_translation(rotated, self.coords)
+
+    # List of the ship's vertices in game screen coords. Only recalculated after the ship has rotated.
+    def world_vertices(self):
+        if self.world_vertex_cache is None:
+            self.world_vertex_cache = self.positions().tolist()
+            world_cache_stats['recomputes'] += 1
+        else:
+            world_cache_stats['hits'] += 1
+        return self.world_vertex_cache
 
-    def draw(self, config):
+    # Draw the ship on the game screen, parm alpha of the way through the current tick.
+    # Returns the rectangle of the screen that has been drawn on.
+    def draw(self, config, alpha=1):
         # TODO Refactor to have separate methods for drawing ship and drawing exploding ship.
 
-        prev_vertex = self.vertices[-1]  # This will make it a complete polygon.
+        drawn = []                                          # Rectangles of the screen that have been drawn on.
 
         if not self.exploding:
-            for vertex in self.vertices:
+            if alpha >= 1 or self.rotation == self.prev_rotation:
+                world_vertices = self.world_vertices()
+            else:
+                rotation = round(self.prev_rotation + (self.rotation - self.prev_rotation) * alpha)
+                world_vertices = self.positions(rotation).tolist()
+            prev_vertex = world_vertices[-1]                # This will make it a complete polygon.
+
+            for vertex in world_vertices:
                 if config.monochrome:
-                    pygame.draw.line(config.screen, config.WHITE, self.position(prev_vertex), self.position(vertex), 1)
+                    drawn.append(pygame.draw.line(config.screen, config.WHITE, prev_vertex, vertex, 1))
 
                 # TODO refactor to draw whole polygon in one go, rather than drawing a number of triangles.
                 else:
-                    triangle = []
-                    triangle.append(self.position(prev_vertex))
-                    triangle.append(self.position(vertex))
-                    triangle.append(self.coords)
-                    pygame.draw.polygon(config.screen, self.colour, triangle, 0)
+                    drawn.append(pygame.draw.polygon(config.screen, self.colour, [prev_vertex, vertex, self.coords], 0))
 
                 prev_vertex = vertex
 
+        elif config.use_particles:
+            return None                                     # The explosion is drawn by the particle system.
+
         else:
-            for v in self.explosion_vertices:
-                scaled_vertex = cc.scale(v, 5 * self.explosion_step / config.target_fps)
-                [x, y] = cc.translation(scaled_vertex, self.coords)
+            scaled_vertices = cc.batch_scale(self.explosion_vertices, 5 * self.explosion_step / config.target_fps)
+            particles = cc.batch_integer_coord(cc.batch_translation(scaled_vertices, self.coords)).tolist()
 
+            for particle in particles:
                 if config.monochrome:
-                    pygame.draw.circle(config.screen, config.WHITE, [int(x), int(y)], 1, 1)
+                    drawn.append(pygame.draw.circle(config.screen, config.WHITE, particle, 1, 1))
                 else:
-                    pygame.draw.circle(config.screen, self.colour, [int(x), int(y)], 4, 4)
+                    drawn.append(pygame.draw.circle(config.screen, self.colour, particle, 4, 4))
+
+            # Make the ship explosion particles randomly twinkle away. Each one has a 1 in 100 chance per frame.
+            twinkle = np.random.randint(1, 101, len(self.explosion_vertices)) == 50
+            self.explosion_vertices = self.explosion_vertices[~twinkle]
 
-                # Make the ship explosion particle randomly twinkle away.
-                if random.randint(1, 100) == 50:
-                    self.explosion_vertices.remove(v)
+        return union_rects(drawn)
 
-    # Begin the explosion of the ship.
-    def explode(self, config):
+    # Begin the explosion of the ship. If there is a parm particle system, the explosion is added to it.
+    def explode(self, config, particle_system=None):
         self.exploding = True  # Start exploding the ship.
         config.ship_explosion_channel.play(config.ship_explosion_sound)
 
+        if particle_system is not None:
+            vertices = self.explosion_vertices[::config.particle_step]
+            velocities = particles.spread(cc.batch_scale(vertices, 5 / config.target_fps), config.particles_per_vertex)
+
+            # Particles randomly twinkle away, each with a 1 in 100 chance per tick, until the explosion is over.
+            lifetimes = np.minimum(np.random.geometric(0.01, len(velocities)), 4 * config.target_fps)
+            particle_system.emit(self.coords, velocities, lifetimes, self.colour)
+
     def animate_explosion(self, config):
         if self.explosion_step < 4 * config.target_fps:    # Higher FPS mean, more animation steps for explosion!
             self.explosion_step += 1
@@ -352,16 +675,25 @@ class SpaceShip:
 
 class Player:
 
-    def __init__(self, player_name, colour, origin):
+    __slots__ = ['player_name', 'colour', 'origin', 'score', 'rocks_destroyed', 'ships_lost', 'bullet_store', 'rng',
+                 'ship']
+
+
+    def __init__(self, player_name, colour, origin, bullet_store=None, rng=random):
 
         self.player_name = player_name          # For example, 'Player 1'.
         self.colour = colour                    # Colour of player's ship, bullets and score [r, g, b].
         self.origin = origin                    # Starting coordinates for player's ship [x, y].
 
         self.score = 0                          # Number of points that he's scored.
-        self.ship = SpaceShip(origin, colour)   # This player's spaceship.
+        self.rocks_destroyed = 0                # Number of rocks that he's shot.
+        self.ships_lost = 0                     # Number of times his ship has been hit by a rock.
+        self.bullet_store = bullet_store        # If not None, EntityStore for the bullets of player's ships.
+        self.rng = rng                          # Random number generator for shaping player's ships.
+        self.ship = SpaceShip(origin, colour, bullet_store, rng)    # This player's spaceship.
 
     def killed_a_rock(self, size):
+        self.rocks_destroyed += 1
         if size == 'Large':
             self.score += 10
         elif size == 'Medium':
@@ -372,8 +704,12 @@ class Player:
     def lost_a_spaceship(self):
         origin = self.ship.coords
         colour = self.ship.colour
-        self.ship = SpaceShip(origin, colour)   # Replace the killed spaceship with a new one.
+        if self.bullet_store is not None:       # Bullets of the killed spaceship go with it.
+            for b in self.ship.bullets:
+                self.bullet_store.remove(b.slot)
+        self.ship = SpaceShip(origin, colour, self.bullet_store, self.rng)  # Replace the killed ship with a new one.
         self.score -= 100
+        self.ships_lost += 1
 
 
 ############################################
@@ -382,16 +718,30 @@ class Player:
 
 class Game:
 
-    def __init__(self, config):
+    # If parm seed is given, the game's random numbers (rock shapes, positions, drifts) come out the same every time.
+    def __init__(self, config, seed=None):
 
         self.config = config
 
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed                                # Seed of this game's random number generator.
+        self.random = random.Random(seed)               # All game logic randomness comes from here, so can be replayed.
+
+        # If the config asks for it, the rocks and bullets keep their values in struct-of-arrays entity stores.
+        if self.config.entity_store:
+            self.rock_store = entity_store.EntityStore()
+            self.bullet_store = entity_store.EntityStore()
+        else:
+            self.rock_store = None
+            self.bullet_store = None
+
         # Create some rocks for start of game.
-        self.num_rocks = 20                             # Target number of rocks to have on screen at once.
+        self.num_rocks = self.config.num_rocks          # Target number of rocks to have on screen at once.
         self.rocks = []
         for r in range(self.num_rocks):
-            new_rock = Rock(self.config, 'Large')
-            new_rock.place_on_side_of_screen(self.config)
+            new_rock = self.new_rock('Large')
+            new_rock.place_on_side_of_screen(self.config, self.random)
             self.rocks.append(new_rock)
 
         assert self.config.num_players in [1, 2]
@@ -419,15 +769,64 @@ class Game:
 
                 origin = [origin_x, origin_y]
 
-            self.players.append(Player(player_name, colour, origin))    # Add each player to the list of players.
+            # Add each player to the list of players.
+            self.players.append(Player(player_name, colour, origin, self.bullet_store, self.random))
 
         self.game_end_time = time.time() + 60                   # '60' is the length of the game in seconds.
 
-    def draw_text(self, text, x, y, colour):
-        textsurface = self.config.myfont.render(text, False, colour)
-        self.config.screen.blit(textsurface, (x, y))
+        self.rock_slot_cache = None                     # Rows of the rock store in rocks order. None = need rebuilding.
+
+        # Grid of rocks, used to quickly find the rocks that are near to each bullet and ship.
+        self.grid = spatial_hash.SpatialHash(self.config.collision_cell_size)
+        self.candidate_pairs = 0                        # Rock / point pairs that the grid passed to narrow phase.
+        self.brute_force_pairs = 0                      # Pairs that would have been tested without the grid.
+
+        self.frame_rects = []                           # Rectangles of the screen drawn on this frame.
+        self.previous_frame_rects = []                  # Rectangles of the screen drawn on last frame.
+        self.full_redraw_needed = True                  # First frame always clears and pushes the whole screen.
+        self.pixels_pushed = 0                          # Number of pixels pushed to the display last frame.
+
+        self.tick_count = 0                             # Number of ticks of game logic done so far.
+        self.last_frame_time = None                     # Time that the last frame started. None = no frames yet.
+        self.unsimulated_time = 0                       # Real time that has passed, that game ticks haven't caught up.
+        self.handle_keys = False                        # Should players' key presses be acted on each tick?
+        self.escape_pressed = False                     # Has a player pressed escape to end the game?
+        self.ticks_per_second = 0                       # Speed that the last call to step() ran at.
+        self.recorder = None                            # If not None, the replay.Recorder that is recording this game.
+
+        # Explosions are drawn with particles. Headless games don't draw anything, so don't need them.
+        if self.config.use_particles and not self.config.headless:
+            self.particles = particles.ParticleSystem()
+        else:
+            self.particles = None
+
+        self.quality = quality.QualityGovernor(self.config)
+
+        if self.config.profile:
+            self.profiler = profiler.FrameProfiler()
+        else:
+            self.profiler = profiler.NullProfiler()     # Does nothing, so costs next to nothing.
+
+    # Make a new rock of parm size. It is not added to the list of rocks.
+    def new_rock(self, size):
+        if self.rock_store is None:
+            return Rock(self.config, size, self.random)
+        else:
+            return StoredRock(self.rock_store, self.config, size, self.random)
+
+    # Draw parm text onto the game screen, or onto parm surface if there is one.
+    def draw_text(self, text, x, y, colour, surface=None):
+        if self.config.use_text_cache:
+            textsurface = self.config.text_cache.render(self.config.myfont, text, colour)
+        else:
+            textsurface = self.config.myfont.render(text, False, colour)
+
+        if surface is None:
+            self.frame_rects.append(self.config.screen.blit(textsurface, (x, y)))
+        else:
+            surface.blit(textsurface, (x, y))
 
-    def draw_centred_white_text(self, text, position, y):
+    def draw_centred_white_text(self, text, position, y, surface=None):
         assert position in ['Centre', 'Left', 'Right']
 
         pixels_per_char = 12                    # Width of 1 char of text of screen in Courier font.
@@ -435,23 +834,72 @@ class Game:
             self.draw_text(text,
                            int(self.config.screen_centre[0] - pixels_per_char * len(text) / 2),
                            y,
-                           self.config.WHITE)
+                           self.config.WHITE,
+                           surface)
         elif position == "Left":
             self.draw_text(text,
                            int(self.config.screen_size[0] * 0.25 - pixels_per_char * len(text) / 2),
                            y,
-                           self.config.WHITE)
+                           self.config.WHITE,
+                           surface)
         else:
             self.draw_text(text,
                            int(self.config.screen_size[0] * 0.75 - pixels_per_char * len(text) / 2),
                            y,
-                           self.config.WHITE)
+                           self.config.WHITE,
+                           surface)
 
     # Draw the frames per second at the bottom left of the screen.
     def draw_fps(self):
         self.draw_text('FPS = ' + str(round(self.config.clock.get_fps())),
                        10, self.config.screen_size[1] - 45, self.config.WHITE)
 
+    # Draw how many times this tick the world-space vertices of rocks and ships were reused, or recalculated.
+    def draw_cache_stats(self):
+        self.draw_text('Cache hits = ' + str(world_cache_stats['hits']) +
+                       ', recomputes = ' + str(world_cache_stats['recomputes']),
+                       10, self.config.screen_size[1] - 65, self.config.WHITE)
+
+    # Draw the number of pixels pushed to the display last frame.
+    def draw_pixels_pushed(self):
+        self.draw_text('Pixels pushed = ' + str(self.pixels_pushed),
+                       10, self.config.screen_size[1] - 105, self.config.WHITE)
+
+    # Draw how many screenshots have been saved and dropped, and how long they took to save.
+    def draw_capture_stats(self):
+        frames = self.config.capture
+        self.draw_text('Captures = ' + str(frames.saved) + ' saved, ' + str(frames.dropped) + ' dropped, ' +
+                       str(round(frames.average_encode_ms())) + '/' + str(round(frames.average_latency_ms())) + ' ms',
+                       10, self.config.screen_size[1] - 125, self.config.WHITE)
+
+    # Draw the hit rate and size of the rock sprite cache.
+    def draw_sprite_cache_stats(self):
+        cache = self.config.sprite_cache
+        self.draw_text('Sprites hit rate = ' + str(round(cache.hit_rate())) + '%, ' + str(len(cache.sprites)) +
+                       ' cached, ' + str(cache.bytes_used // 1024) + ' KB',
+                       10, self.config.screen_size[1] - 85, self.config.WHITE)
+
+    # Draw the number of rock / point pairs tested by the collision narrow phase, out of the number that would have been
+    # tested without the broad phase grid.
+    def draw_collision_stats(self):
+        self.draw_text('Pairs = ' + str(self.candidate_pairs) + '/' + str(self.brute_force_pairs),
+                       10, self.config.screen_size[1] - 25, self.config.WHITE)
+
+    # Draw the current quality level, and the average time each frame is taking out of the time budget for it.
+    def draw_quality(self):
+        self.draw_text('Quality = ' + self.quality.name() + ', ' +
+                       str(round(1000 * self.quality.average_frame_time(), 1)) + '/' +
+                       str(round(1000 * self.quality.budget, 1)) + ' ms',
+                       10, self.config.screen_size[1] - 145, self.config.WHITE)
+
+    # Draw the average milliseconds per frame spent in each phase, at the bottom right of the screen.
+    def draw_profile(self):
+        y = self.config.screen_size[1] - 25
+        for (name, milliseconds) in reversed(self.profiler.breakdown()):
+            self.draw_text(format(name, '<16') + format(milliseconds, '6.2f') + ' ms',
+                           self.config.screen_size[0] - 300, y, self.config.WHITE)
+            y -= 20
+
     def draw_game_info(self):
         # Always draw first player's score, as there is always at least 1 player.
         if self.config.monochrome:
@@ -474,160 +922,463 @@ class Game:
             self.draw_centred_white_text('Time: ' + str(round(self.game_end_time - time.time())), 'Centre', 10)
 
     # Draw instruction on screen during demo mode.
+    # As the instructions never change, they are rendered once onto a see-through surface the size of the screen, and
+    # that is blitted each frame.
     def draw_demo_info(self):
-        self.draw_centred_white_text('GAME OVER', 'Centre', self.config.screen_centre[1] - 150)
-        self.draw_centred_white_text('Press 1 for 1 player game', 'Centre', self.config.screen_centre[1] - 100)
-        self.draw_centred_white_text('Press 2 for 2 player game', 'Centre', self.config.screen_centre[1] - 75)
-
-        self.draw_centred_white_text('Player 1', 'Left', self.config.screen_centre[1] + 50)
-        self.draw_centred_white_text('Z = Rotate anticlockwise', 'Left', self.config.screen_centre[1] + 75)
-        self.draw_centred_white_text('X = Rotate clockwise', 'Left', self.config.screen_centre[1] + 100)
-        self.draw_centred_white_text('A = Fire gun', 'Left', self.config.screen_centre[1] + 125)
-
-        self.draw_centred_white_text('Player 2', 'Right', self.config.screen_centre[1] + 50)
-        self.draw_centred_white_text('← = Rotate anticlockwise', 'Right', self.config.screen_centre[1] + 75)
-        self.draw_centred_white_text('→ = Rotate clockwise', 'Right', self.config.screen_centre[1] + 100)
-        self.draw_centred_white_text('/ = Fire gun', 'Right', self.config.screen_centre[1] + 125)
+        if not self.config.use_text_cache:
+            self.draw_demo_text()
+            return
+
+        if self.config.demo_info_surface is None:
+            surface = pygame.Surface(self.config.screen_size)
+            self.draw_demo_text(surface)
+            surface.set_colorkey(self.config.BLACK, pygame.RLEACCEL)
+            self.config.demo_info_surface = surface
+            self.config.demo_info_rect = surface.get_bounding_rect()
+
+        surface = self.config.demo_info_surface
+        if self.config.dirty_rects and not self.full_redraw_needed:
+            # The text is still on screen from last frame, apart from where it has been cleared or drawn over.
+            text_rect = self.config.demo_info_rect
+            for rect in self.previous_frame_rects + self.frame_rects:
+                if rect is not None and text_rect.colliderect(rect):
+                    clipped = text_rect.clip(rect)
+                    self.config.screen.blit(surface, clipped, clipped)
+        else:
+            rect = self.config.demo_info_rect
+            self.frame_rects.append(self.config.screen.blit(surface, rect, rect))
+
+    # Draw the text of the demo mode instructions onto the game screen, or onto parm surface if there is one.
+    def draw_demo_text(self, surface=None):
+        centre_y = self.config.screen_centre[1]
+        self.draw_centred_white_text('GAME OVER', 'Centre', centre_y - 150, surface)
+        self.draw_centred_white_text('Press 1 for 1 player game', 'Centre', centre_y - 100, surface)
+        self.draw_centred_white_text('Press 2 for 2 player game', 'Centre', centre_y - 75, surface)
+
+        self.draw_centred_white_text('Player 1', 'Left', centre_y + 50, surface)
+        self.draw_centred_white_text('Z = Rotate anticlockwise', 'Left', centre_y + 75, surface)
+        self.draw_centred_white_text('X = Rotate clockwise', 'Left', centre_y + 100, surface)
+        self.draw_centred_white_text('A = Fire gun', 'Left', centre_y + 125, surface)
+
+        self.draw_centred_white_text('Player 2', 'Right', centre_y + 50, surface)
+        self.draw_centred_white_text('← = Rotate anticlockwise', 'Right', centre_y + 75, surface)
+        self.draw_centred_white_text('→ = Rotate clockwise', 'Right', centre_y + 100, surface)
+        self.draw_centred_white_text('/ = Fire gun', 'Right', centre_y + 125, surface)
 
     # This one method does the drawing of all of the graphical elements in the game.
-    def draw_all_elements(self):
+    # Parm alpha is how far through the current tick the display is, from 0 to 1. Things that move are drawn that
+    # fraction of the way from where they were last tick to where they are now.
+    def draw_all_elements(self, alpha=1):
         # Clear the screen and set the screen background.
-        self.config.screen.fill(self.config.BLACK)
+        # In dirty rectangle mode, only the parts of the screen that were drawn on last frame need clearing.
+        with self.profiler.phase('Draw clear'):
+            if self.config.dirty_rects and not self.full_redraw_needed:
+                for rect in self.previous_frame_rects:
+                    self.config.screen.fill(self.config.BLACK, rect)
+            else:
+                self.config.screen.fill(self.config.BLACK)
+
+        self.frame_rects = []                   # Rectangles of the screen drawn on this frame.
 
-        for r in self.rocks:                    # Draw each rock.
-            r.draw(self.config)
+        with self.profiler.phase('Draw rocks'):
+            for r in self.rocks:                    # Draw each rock.
+                self.frame_rects.append(r.draw(self.config, alpha))
 
         # Loop through all of the players, drawing their ships, and their ship's bullets.
-        for p in self.players:
-            p.ship.draw(self.config)                       # Draw the player's space ship.
+        with self.profiler.phase('Draw ships'):
+            for p in self.players:
+                self.frame_rects.append(p.ship.draw(self.config, alpha))   # Draw the player's space ship.
 
-            for b in p.ship.bullets:                  # Draw each bullet.
-                b.draw(self.config)
+                for b in p.ship.bullets:                  # Draw each bullet.
+                    self.frame_rects.append(b.draw(self.config, alpha))
 
-        self.draw_game_info()
+        if self.particles is not None:
+            with self.profiler.phase('Draw particles'):
+                if self.config.monochrome:
+                    rects = self.particles.draw(self.config.screen, 1, alpha, self.config.WHITE)
+                else:
+                    rects = self.particles.draw(self.config.screen, 4, alpha)
+                self.frame_rects.append(union_rects(rects))
+
+        with self.profiler.phase('Draw text'):
+            self.draw_game_info()
+
+            if self.config.demo_mode:
+                self.draw_demo_info()
+
+            # If in debug mode, draw the frames per second onscreen.
+            if self.config.debug:
+                self.draw_fps()
+                self.draw_collision_stats()
+                self.draw_cache_stats()
+                self.draw_sprite_cache_stats()
+                self.draw_pixels_pushed()
+                if self.config.capture.captured:
+                    self.draw_capture_stats()
+                if self.config.adaptive_quality:
+                    self.draw_quality()
+                self.draw_profile()
+
+        with self.profiler.phase('Flip'):
+            self.update_display()
+
+    # Push this frame to the display. In dirty rectangle mode only the parts of the screen that have changed since last
+    # frame are pushed, unless they add up to more than the threshold fraction of the screen.
+    def update_display(self):
+        frame_rects = [rect for rect in self.frame_rects if rect is not None]
+        screen_area = self.config.screen_size[0] * self.config.screen_size[1]
+
+        if self.config.dirty_rects and not self.full_redraw_needed:
+            dirty_rects = self.previous_frame_rects + frame_rects
+            dirty_area = sum(rect.width * rect.height for rect in dirty_rects)
+        else:
+            dirty_rects = None                  # Whole screen has been redrawn, so the whole screen is pushed.
+            dirty_area = screen_area
 
-        if self.config.demo_mode:
-            self.draw_demo_info()
+        if dirty_rects is None or dirty_area > self.config.dirty_rects_threshold * screen_area:
+            pygame.display.flip()
+            self.pixels_pushed = screen_area
+        else:
+            pygame.display.update(dirty_rects)
+            self.pixels_pushed = dirty_area
 
-        # If in debug mode, draw the frames per second onscreen.
-        if self.config.debug:
-            self.draw_fps()
+        self.previous_frame_rects = frame_rects
+        self.full_redraw_needed = False
 
-        pygame.display.flip()
+        if self.config.first_frame_time is None:
+            self.config.first_frame_time = time.perf_counter() - self.config.start_time
+            trace(self.config, 'First frame after %.3f seconds. Asset load times = %s',
+                  self.config.first_frame_time, dict(self.config.assets.timings))
 
-    # Take a screenshot. Save it in the 'screenshots' folder.
+    # Take a screenshot. It is saved in the 'screenshots' folder by the capture thread.
+    # Holding down the screenshot key captures a sequence of frames, up to the capture rate.
     def take_screenshot(self):
         screenshot_name = 'screenshots/screenshot' + format(self.config.screenshot_num, '04') + '.png'
-        pygame.image.save(self.config.screen, screenshot_name)
-        self.config.screenshot_num += 1
+        if self.config.capture.capture(self.config.screen, screenshot_name):
+            self.config.screenshot_num += 1
 
-    # Act on key presses bu game players.
+    # Read the key presses of game players. Returns the input mask of the game controls that are held down.
     def key_handling(self):
         keys = pygame.key.get_pressed()
 
+        inputs = 0
         if keys[pygame.K_z]:
-            self.players[0].ship.rotate_anticlockwise()
+            inputs |= P1_ANTICLOCKWISE
         if keys[pygame.K_x]:
-            self.players[0].ship.rotate_clockwise()
+            inputs |= P1_CLOCKWISE
         if keys[pygame.K_a]:
-            self.players[0].ship.fire_bullet(self.config)       # Need config, as it contains the bullet firing sound.
+            inputs |= P1_FIRE
 
         if self.config.num_players == 2:
             if keys[pygame.K_LEFT]:
-                self.players[1].ship.rotate_anticlockwise()
+                inputs |= P2_ANTICLOCKWISE
             if keys[pygame.K_RIGHT]:
-                self.players[1].ship.rotate_clockwise()
+                inputs |= P2_CLOCKWISE
             if keys[pygame.K_SLASH]:
-                self.players[1].ship.fire_bullet(self.config)   # Need config, as it contains the bullet firing sound.
+                inputs |= P2_FIRE
 
         if keys[pygame.K_g]:
             self.take_screenshot()
 
         if keys[pygame.K_ESCAPE]:
-            return True
+            self.escape_pressed = True
+
+        return inputs
+
+    # Make the players' ships do whatever the parm input mask says.
+    def apply_inputs(self, inputs):
+        controls = [(P1_ANTICLOCKWISE, P1_CLOCKWISE, P1_FIRE), (P2_ANTICLOCKWISE, P2_CLOCKWISE, P2_FIRE)]
+
+        for (p, (anticlockwise, clockwise, fire)) in zip(self.players, controls):
+            if inputs & anticlockwise:
+                p.ship.rotate_anticlockwise()
+            if inputs & clockwise:
+                p.ship.rotate_clockwise()
+            if inputs & fire:
+                p.ship.fire_bullet(self.config)         # Need config, as it contains the bullet firing sound.
+
+    # CRC32 of the game state - everything that the players' inputs and the seed decide. If a replay of this game
+    # gets a different checksum at the same tick, the replay has diverged from the original game.
+    def state_checksum(self):
+        values = [self.tick_count]
+        for r in self.rocks:
+            values += [r.coords[0], r.coords[1], r.drift[0], r.drift[1], r.rotation, r.radius,
+                       r.exploding, r.explosion_step, r.kill]
+        for p in self.players:
+            values += [p.score, p.ship.rotation, p.ship.exploding, p.ship.explosion_step]
+            for b in p.ship.bullets:
+                values += [b.coords[0], b.coords[1], b.kill]
+
+        return zlib.crc32(np.array(values, dtype=float).tobytes())
+
+    # Numpy array of the rows of the rock store, in the order of the list of rocks. Only rebuilt after rocks have been
+    # added or removed. Rocks are only ever removed by remove_dead_entities, which empties the cache, and new rocks are
+    # only ever appended, which changes the length of the list.
+    def rock_slots(self):
+        if self.rock_slot_cache is None or len(self.rock_slot_cache) != len(self.rocks):
+            self.rock_slot_cache = np.array([r.slot for r in self.rocks], dtype=int)
+        return self.rock_slot_cache
+
+    # Check whether any rocks have been hit by bullets, or have hit ships.
+    def check_collisions(self):
+        # Rebuild the grid using this tick's rock positions. Each rock covers a square big enough for its furthest
+        # vertex from its centre.
+        self.grid.clear()
+        if self.rock_store is None:
+            live_rocks = 0
+            for r in self.rocks:
+                if not r.exploding:
+                    self.grid.insert(r, r.coords, r.max_radius)
+                    live_rocks += 1
         else:
-            return False
+            # Rows of the store for rocks that are not exploding. They are put in the grid in the order of the list of
+            # rocks, like the objects are, so that when a bullet is as near to two rocks, it hits the same one.
+            store = self.rock_store
+            slots = self.rock_slots()
+            live = ~store.exploding[slots]
+            if live.all():
+                live_rock_list = self.rocks
+            else:
+                slots = slots[live]
+                live_rock_list = list(itertools.compress(self.rocks, live.tolist()))
+            self.grid.insert_many(live_rock_list, store.coords[slots], store.max_radius[slots])
+            live_rocks = len(slots)
 
-    # Do one tick of the game logic and drawing to screen, etc.
-    # If in demo mode, collision detection will be skipped.
-    def animate_1_tick(self):
-        # Ensure that the game ticks do not exceed the target FPS.
-        self.config.clock.tick(self.config.target_fps)
+        self.candidate_pairs = 0
+        self.brute_force_pairs = 0
 
+        # Check whether any rocks have been hit by a bullet. The whole path that each bullet took this tick is checked,
+        # so that fast bullets can't go straight through small rocks, whatever the tick rate.
+        for p in self.players:
+            for b in p.ship.bullets:
+                if b.kill:                                  # Bullet has left the screen, or already hit a rock.
+                    continue
+                self.brute_force_pairs += live_rocks
+
+                hit_rock = None                             # Rock that the bullet hit first, if any.
+                hit_distance = None                         # How far along its path the bullet hit that rock.
+                for r in self.grid.query_segment(b.prev_coords, b.coords):
+                    if not r.exploding:                     # Rock might have just been hit by another bullet.
+                        self.candidate_pairs += 1
+                        distance = r.check_path_collision(b.prev_coords, b.coords)
+                        if distance is not None and (hit_distance is None or distance < hit_distance):
+                            hit_rock = r
+                            hit_distance = distance
+
+                if hit_rock is not None:
+                    hit_rock.explode(self.config, self.particles)
+                    b.kill = True  # This bullet has killed a rock, so it must be killed itself too.
+                    p.killed_a_rock(hit_rock.size)
+
+        # Check whether any rocks have hit a ship.
+        for p in self.players:
+            if not p.ship.exploding:
+                self.brute_force_pairs += live_rocks
+                for r in self.grid.query_point(p.ship.coords):
+                    if not r.exploding and not p.ship.exploding:
+                        self.candidate_pairs += 1
+                        r.check_collision(p.ship.coords)
+                        if r.collision:  # The rock hit the ship.
+                            r.explode(self.config, self.particles)  # Start exploding the rock.
+                            p.ship.explode(self.config, self.particles)
+
+    # Do one frame of game logic and drawing to screen, etc.
+    #
+    # With a fixed timestep, the game logic always runs at target_fps ticks per second of real time, however fast or
+    # slow the frames are. Each frame does however many ticks are due - possibly none - and then draws everything part
+    # way between the last two ticks. Without a fixed timestep, each frame is one tick, paced by the frame limiter.
+    def animate_1_tick(self):
+        if not self.config.fixed_timestep:
+            # Ensure that the game ticks do not exceed the target FPS.
+            self.config.clock.tick(self.config.target_fps)
+
+            frame_start = time.perf_counter()
+            self.profiler.begin_frame()
+            self.simulate_1_tick()
+            self.draw_all_elements()
+            self.profiler.end_frame()
+            self.frame_done(frame_start)
+            return
+
+        self.config.clock.tick(self.config.render_fps)         # 0 = no frame limiter.
+        frame_start = time.perf_counter()
+        self.profiler.begin_frame()
+
+        tick_length = 1 / self.config.target_fps
+        now = time.perf_counter()
+        if self.last_frame_time is None:                        # First frame of the game does one tick.
+            elapsed = tick_length
+        else:
+            # If the computer can't keep up, the game slows down rather than doing ever more ticks per frame.
+            elapsed = min(now - self.last_frame_time, self.config.max_ticks_per_frame * tick_length)
+        self.last_frame_time = now
+
+        self.unsimulated_time += elapsed
+        while self.unsimulated_time >= tick_length:
+            self.simulate_1_tick()
+            self.unsimulated_time -= tick_length
+
+        self.draw_all_elements(self.unsimulated_time / tick_length)
+        self.profiler.end_frame()
+        self.frame_done(frame_start)
+
+    # Tell the quality governor how long the frame that started at parm frame_start took, not counting time spent
+    # waiting for the frame limiter.
+    def frame_done(self, frame_start):
+        if self.config.adaptive_quality:
+            self.quality.frame_done(time.perf_counter() - frame_start)
+
+    # Do one tick of game logic, including acting on the players' key presses if this game is being played.
+    # If there is a parm inputs mask, it is used instead of the keyboard. That's how replays are re-simulated.
+    def simulate_1_tick(self, inputs=None):
         for p in self.players:
-            # If player ship exploding, do the next step of the explosion animation.
-            if p.ship.exploding:
-                p.ship.animate_explosion(self.config)
+            p.ship.prev_rotation = p.ship.rotation          # So ship rotation can be drawn part way through a tick.
 
-            if p.ship.kill:
-                p.lost_a_spaceship()
+        with self.profiler.phase('Input'):
+            if inputs is None:
+                inputs = 0
+                if self.handle_keys:
+                    inputs = self.key_handling()
 
-            for b in p.ship.bullets:
-                b.move()
-                b.check_onscreen(self.config)
-                if b.kill:
-                    p.ship.bullets.remove(b)
-                    trace(self.config, 'Bullet removed, bullets left for ' +
-                          p.player_name + ' =' + str(len(p.ship.bullets)))
+            self.apply_inputs(inputs)
 
-        for r in self.rocks:
-            r.move()
-            r.check_onscreen(self.config)
+        self.update()
 
-            # Check whether this rock has been hit by a bullet.
-            if not r.exploding:
-                for p in self.players:
+        if self.recorder is not None:
+            self.recorder.record_tick(self, inputs)
+
+    # Run parm number of ticks of game logic as fast as the CPU allows. Nothing is drawn, and there is no frame limiter.
+    # Returns the number of ticks per second that were achieved.
+    def step(self, n=1):
+        start_time = time.perf_counter()
+        for t in range(n):
+            self.update()
+        elapsed = time.perf_counter() - start_time
+
+        if elapsed > 0:
+            self.ticks_per_second = n / elapsed
+        return self.ticks_per_second
 
-                    # In demo mode, don't check for collisions.
-                    if not self.config.demo_mode:
-                        for b in p.ship.bullets:
-                            r.check_collision(b.coords)
-                            if r.collision:
-                                r.explode(self.config)
-                                b.kill = True  # This bullet has killed a rock, so it must be killed itself too.
-                                p.killed_a_rock(r.size)
-
-            # In demo mode, don't check for collisions.
-            if not r.exploding and not self.config.demo_mode:
+    # Do one tick of the game logic - moving, collisions, scoring and creating new rocks. There is no drawing.
+    # If in demo mode, collision detection will be skipped.
+    def update(self):
+        self.tick_count += 1
+
+        world_cache_stats['hits'] = 0                   # Start counting cache use afresh for this tick.
+        world_cache_stats['recomputes'] = 0
+
+        with self.profiler.phase('Ships'):
+            for p in self.players:
+                # If player ship exploding, do the next step of the explosion animation.
+                if p.ship.exploding:
+                    p.ship.animate_explosion(self.config)
+
+                if p.ship.kill:
+                    p.lost_a_spaceship()
+
+        # With entity stores, all of the bullets are moved and checked in one go.
+        with self.profiler.phase('Move bullets'):
+            if self.bullet_store is not None:
+                self.bullet_store.move_all()
+                self.bullet_store.check_onscreen(self.config)
+            else:
                 for p in self.players:
-                    if not p.ship.exploding:
+                    for b in p.ship.bullets:
+                        b.move()
+                        b.check_onscreen(self.config)
+
+        with self.profiler.phase('Move rocks'):
+            if self.rock_store is None:
+                for r in self.rocks:
+                    r.move()
+                    r.check_onscreen(self.config)
+            else:
+                self.rock_store.move_all()
+                self.rock_store.check_onscreen(self.config)
 
-                        r.check_collision(p.ship.coords)
-                        if r.collision:  # The rock hit the ship.
-                            r.explode(self.config)  # Start exploding the rock.
-                            p.ship.explode(self.config)
-
-            # If this rock is exploding, do the steps of the explosion animation - including possibly, creating
-            # child rocks.
-            if r.exploding:
-                r.animate_explosion(self)
-
-            if r.kill:
-                if r.exploding:  # Must have collided with something.
-                    # If we are getting low on rocks, then create a new large rock.
-                    if len(self.rocks) <= self.num_rocks:
-                        new_rock = Rock(self.config, 'Large')
-                        new_rock.place_on_side_of_screen(self.config)
-                        self.rocks.append(new_rock)
-
-                else:  # Must be getting killed due to being at edge of screen.
-                    # Make new rock. Same size as one that is about to be removed.
-                    new_rock = Rock(self.config, r.size)
-                    new_rock.place_on_side_of_screen(self.config)
+        # In demo mode, don't check for collisions.
+        if not self.config.demo_mode:
+            with self.profiler.phase('Collisions'):
+                self.check_collisions()
+
+        # If a rock is exploding, do the steps of the explosion animation - including possibly, creating child rocks.
+        # With entity stores, all of the explosion animations are stepped on in one go. Child rocks are added to the end
+        # of the list of rocks, and are first moved next tick.
+        with self.profiler.phase('Explosions'):
+            if self.particles is not None:
+                self.particles.update()
+
+            if self.rock_store is None:
+                for r in [r for r in self.rocks if r.exploding]:
+                    r.animate_explosion(self)
+            else:
+                half_way = set(self.rock_store.step_explosions(self.config.target_fps,
+                                                               int(0.5 * self.config.target_fps)))
+
+                # Children are spawned in the order of the list of rocks, not the order of the store's rows, so the
+                # game's random numbers are used in the same order as without the store, and the same game is played.
+                for r in [r for r in self.rocks if r in half_way]:
+                    r.spawn_children(self)
+
+            self.remove_dead_entities()
+
+    # Remove all of the rocks and bullets that have been flagged to be killed this tick, in a single pass of each list.
+    # Lists are never changed while they are being looped through, so every live rock and bullet gets exactly one move
+    # per tick.
+    def remove_dead_entities(self):
+        for p in self.players:
+            if any(b.kill for b in p.ship.bullets):
+                p.ship.bullet_pool.remove_dead()
+
+                trace(self.config, 'Bullets removed, bullets left for %s =%d', p.player_name, len(p.ship.bullets))
+
+        if self.rock_store is not None and not self.rock_store.kill[:self.rock_store.count].any():
+            return                                          # Quick check of all of the store's rocks in one go.
+
+        # Killed rocks are replaced in the order of the list of rocks, with or without the store, so that the game's
+        # random numbers are used in the same order either way.
+        killed_rocks = [r for r in self.rocks if r.kill]
+        if not killed_rocks:
+            return
+
+        live_rock_count = len(self.rocks)
+        self.rocks = [r for r in self.rocks if not r.kill]   # Rocks that are to be killed are removed in one pass.
+        self.rock_slot_cache = None                         # Rows of the store are about to move.
+
+        for r in killed_rocks:
+            if r.exploding:  # Must have collided with something.
+                # If we are getting low on rocks, then create a new large rock.
+                if live_rock_count <= self.num_rocks:
+                    new_rock = self.new_rock('Large')
+                    new_rock.place_on_side_of_screen(self.config, self.random)
                     self.rocks.append(new_rock)
+                    live_rock_count += 1
 
-                self.rocks.remove(r)  # Rock is to be killed, so remove it from the list of rocks.
+            else:  # Must be getting killed due to being at edge of screen.
+                # Make new rock. Same size as one that is about to be removed.
+                new_rock = self.new_rock(r.size)
+                new_rock.place_on_side_of_screen(self.config, self.random)
+                self.rocks.append(new_rock)
+                live_rock_count += 1
 
-                trace(self.config, r.size + ' rock removed, rocks left=' + str(len(self.rocks)))
+            if self.rock_store is not None:
+                self.rock_store.remove(r.slot)
+            live_rock_count -= 1
 
-        self.draw_all_elements()
+            trace(self.config, '%s rock removed, rocks left=%d', r.size, live_rock_count)
 
     # Actually play the game.
     def play(self):
         done = False
+        self.handle_keys = True                 # Key presses are acted on once per tick of game logic.
         self.config.demo_mode = False           # This is not a demo, this is the real game.
         self.config.monochrome = False          # Actual games are in colour.
 
+        if self.config.record_replays:
+            self.recorder = replay.Recorder(self)
+
+        self.profiler.start_trace()             # Only the game being played goes into the trace, not the menu demo.
+
         # Loop until the user clicks the close button, or game time is up.
         while not done:
             for event in pygame.event.get():    # User did something
@@ -639,32 +1390,57 @@ class Game:
             if time.time() >= self.game_end_time:
                 done = True
 
-            escape_pressed = self.key_handling()
-            if escape_pressed:
+            self.animate_1_tick()
+
+            if self.escape_pressed:
                 done = True
 
-            self.animate_1_tick()
+        self.quality.restore()                  # Next game starts at full quality.
+        self.full_redraw_needed = True          # Demo mode menu wasn't on screen during the game, so draw it all.
+
+        if self.config.profile:
+            self.profiler.export_chrome_trace(self.config.profile_trace_file)
+            trace(self.config, 'Profile trace saved to %s.', self.config.profile_trace_file)
+        self.profiler.stop_trace()
+
+        if self.recorder is not None:
+            os.makedirs(self.config.replay_folder, exist_ok=True)
+            replay_name = (self.config.replay_folder + '/replay' + datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+                           + '.srr')
+            self.recorder.save(replay_name)
+            trace(self.config, 'Replay saved to %s.', replay_name)
 
 
 ############################################
 # CONFIG
 ############################################
 
+# Stands in for a Pygame sound channel when running headless.
+class SilentChannel:
+
+    def play(self, sound):
+        pass
+
+
 class Config:
 
-    def __init__(self, debug, target_fps):
+    # If parm vsync is True, the display is asked to show frames in step with the monitor's refresh.
+    def __init__(self, debug, target_fps, headless=False, vsync=False):
+
+        self.start_time = time.perf_counter()
+        self.first_frame_time = None        # Seconds from start up to the first frame being on the display.
 
         self.debug = debug                  # True=logging sent to stdout, and current FPS displayed on screen.
+        self.logger = logger.Logger()       # Log messages are written to stdout by a background thread.
         self.target_fps = target_fps        # Some game animations use target Frames Per Second to control their pace.
+        self.headless = headless            # True=no display, no sound and no frame limiter. Just the game logic.
 
         self.monochrome = True              # True=old style graphics used for rocks, etc.
         self.num_players = 1
 
-        self.demo_mode = True
+        self.demo_mode = not headless       # Headless games are real games, with collisions and scoring.
         self.quit = False                   # Will become true when the use chooses to quit the game.
 
-        pygame.init()                       # Initialize the game engine.
-
         # Define the colors we will use in RGB format.
         self.BLACK = (0, 0, 0)
         self.WHITE = (255, 255, 255)
@@ -674,27 +1450,25 @@ class Config:
         # Set the height and width of the viewport.
         self.screen_size = [800, 600]
         self.screen_centre = [int(self.screen_size[0] / 2), int(self.screen_size[1] / 2)]
-        self.screen = pygame.display.set_mode(self.screen_size)
 
-        self.clock = pygame.time.Clock()
-
-        # Start the Pygame text rendering system.
-        pygame.font.init()
-        self.myfont = pygame.font.SysFont('Courier New', 20)
-
-        pygame.display.set_caption('Space Rocks')   # The game window title.
-
-        # Start the Pygame sound system.
-        pygame.mixer.init()
-        pygame.mixer.set_num_channels(3)            # One channel for laser gun fires, one for explosions.
-
-        # Get some game sounds ready, and allocate sound channels for them.
-        self.explosion_sound = pygame.mixer.Sound('assets/110115__ryansnook__small-explosion.wav')
-        self.laser_sound = pygame.mixer.Sound('assets/341235__sharesynth__laser01.wav')
-        self.ship_explosion_sound = pygame.mixer.Sound('assets/235968__tommccann__explosion-01.wav')
-        self.explosion_channel = pygame.mixer.Channel(0)
-        self.laser_channel = pygame.mixer.Channel(1)
-        self.ship_explosion_channel = pygame.mixer.Channel(2)
+        # With a fixed timestep, game logic always runs at target_fps ticks per second. Frames are drawn as fast as
+        # render_fps allows (0 = no limit), or in step with the display if vsync is True. Vsync has to be known before
+        # the display is started, so it is a parm.
+        self.fixed_timestep = True
+        self.render_fps = 60                # Smooth enough, without running a CPU core flat out in the menus.
+        self.vsync = vsync
+        self.max_ticks_per_frame = 5
+
+        if self.headless:
+            # Game logic still asks for sounds to be played, but nobody will hear them.
+            self.explosion_sound = None
+            self.laser_sound = None
+            self.ship_explosion_sound = None
+            self.explosion_channel = SilentChannel()
+            self.laser_channel = SilentChannel()
+            self.ship_explosion_channel = SilentChannel()
+        else:
+            self.start_pygame()
 
         # Border greater than width of largest possible rock. This ensures that when a rock is removed for being
         # outside of the screen plus border, we can be sure that all of the rock is off screen. If the border wasn't
@@ -709,6 +1483,92 @@ class Config:
 
         self.screenshot_num = 1                         # Number of screenshots taken.
 
+        # Screenshots are queued and saved by a background thread. If more than 16 are waiting, extras are dropped.
+        self.capture = capture.FrameCapture(16, target_fps)
+
+        # Time each phase of each frame. Breakdown is drawn in debug mode, and saved as a Chrome trace after each game.
+        self.profile = False
+        self.profile_trace_file = 'profile_trace.json'
+
+        # Games can record the players' inputs, so that they can be re-simulated by replay.py.
+        self.record_replays = False
+        self.replay_folder = 'replays'
+        self.replay_checksum_interval = 25              # Number of ticks between checksums of the game state.
+
+        # Size of the grid cells used by the collision broad phase. Should be about the size of a large rock.
+        self.collision_cell_size = 100
+
+        self.num_rocks = 20                 # Target number of rocks to have on screen at once.
+        self.bullet_speed = 500             # Pixels per second.
+        self.entity_store = False           # True=rocks and bullets keep their values in struct-of-arrays stores.
+
+        # Only redraw and push the parts of the screen that have changed, unless more than the threshold fraction of the
+        # screen has changed, in which case the whole screen is pushed.
+        self.dirty_rects = True
+        self.dirty_rects_threshold = 0.5
+
+        # Text is rendered once, and then kept in a cache for as long as it is still being drawn.
+        self.use_text_cache = True
+        self.text_cache = text_cache.TextCache(64)
+        self.demo_info_surface = None                   # Demo mode instructions, rendered when first needed.
+        self.demo_info_rect = None                      # Part of the surface that has text on it.
+
+        # Explosions are drawn by a particle system, with this many particles for each vertex of the rock or ship.
+        self.use_particles = True
+        self.particles_per_vertex = 1
+
+        # If frames take longer than a tick, the quality governor turns down the detail that things are drawn in. Every
+        # particle_step'th explosion particle is made, and every rock_vertex_step'th vertex of each rock is drawn.
+        self.adaptive_quality = True
+        self.particle_step = 1
+        self.rock_vertex_step = 1
+
+        # Every rock is one of the shapes in this library. Each shape is a polygon with a colour.
+        self.rock_shapes = rock_shapes.RockShapeLibrary()
+
+        # Rocks are drawn by blitting pre-rendered sprites. The cache of sprites is limited to about this many bytes.
+        self.use_sprite_cache = True
+        self.sprite_cache_bytes = 64 * 1024 * 1024
+        self.sprite_cache = sprite_cache.SpriteCache(self.sprite_cache_bytes)
+
+    # Start up the display and text systems. Fonts and sounds are loaded by a background thread.
+    def start_pygame(self):
+        pygame.display.init()               # Only the parts of the game engine needed for the first frame.
+        pygame.font.init()
+
+        self.screen = None
+        if self.vsync:
+            try:
+                self.screen = pygame.display.set_mode(self.screen_size, pygame.SCALED, vsync=1)
+            except (AttributeError, TypeError, pygame.error):   # Older Pygame, or vsync not available.
+                self.screen = None
+        if self.screen is None:
+            self.screen = pygame.display.set_mode(self.screen_size)
+
+        self.clock = pygame.time.Clock()
+
+        pygame.display.set_caption('Space Rocks')   # The game window title.
+
+        # Game sounds are played by filename. Until they have been loaded, they are not played.
+        self.explosion_sound = '110115__ryansnook__small-explosion.wav'
+        self.laser_sound = '341235__sharesynth__laser01.wav'
+        self.ship_explosion_sound = '235968__tommccann__explosion-01.wav'
+
+        # Load the font, start the Pygame sound system and decode the sounds, in the background.
+        self.assets = asset_manager.AssetManager()
+        self.assets.start_loading([('Courier New', 20)],
+                                  3,                # One channel for laser gun fires, one for explosions.
+                                  [self.explosion_sound, self.laser_sound, self.ship_explosion_sound])
+
+        self.explosion_channel = asset_manager.SoundChannel(self.assets, 0)
+        self.laser_channel = asset_manager.SoundChannel(self.assets, 1)
+        self.ship_explosion_channel = asset_manager.SoundChannel(self.assets, 2)
+
+    # Font used for all text. Waits for the asset manager, if it hasn't finished loading it yet.
+    @property
+    def myfont(self):
+        return self.assets.font('Courier New', 20)
+
     def choose_options(self):
         this_game = Game(self)
 
@@ -741,3 +1601,5 @@ class Config:
 
         # Be IDLE friendly.
         pygame.quit()
+        self.capture.close()                # Finish saving any screenshots that are still waiting.
+        self.logger.close()                 # Write out any log messages that are still waiting.
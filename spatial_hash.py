@@ -0,0 +1,72 @@
+# A uniform grid, used as the broad phase of collision detection.
+#
+# Each object is filed into every grid cell that its bounding square overlaps. To find the objects that might
+# contain a point, only the one grid cell that the point falls into needs to be looked at. So rocks that are on the
+# other side of the screen from a bullet never get as far as the (time consuming) point-in-polygon tests.
+
+import numpy as np
+
+
+class SpatialHash:
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size                  # Width and height of each grid cell, in pixels.
+        self.cells = {}                             # Key is (column, row), value is list of objects in that cell.
+
+    # Empty the grid, ready for it to be rebuilt.
+    def clear(self):
+        self.cells = {}
+
+    # Which grid cell is the parm coordinate in?
+    def cell_of(self, vertex):
+        return int(vertex[0] // self.cell_size), int(vertex[1] // self.cell_size)
+
+    # File parm item into each of the cells that the square centred on coords, with sides 2 x half_width, overlaps.
+    def insert(self, item, coords, half_width):
+        (min_col, min_row) = self.cell_of([coords[0] - half_width, coords[1] - half_width])
+        (max_col, max_row) = self.cell_of([coords[0] + half_width, coords[1] + half_width])
+
+        for col in range(min_col, max_col + 1):
+            for row in range(min_row, max_row + 1):
+                if (col, row) in self.cells:
+                    self.cells[(col, row)].append(item)
+                else:
+                    self.cells[(col, row)] = [item]
+
+    # Same as insert, but for a whole batch of items. Parm coords is an (N, 2) numpy array, and half_widths has N values.
+    # The cells that each item overlaps are worked out for the whole batch at once. Each column of cell numbers is
+    # turned into one flat list, rather than a small list for each item, so that thousands of items don't make thousands
+    # of lists for the garbage collector to track.
+    def insert_many(self, items, coords, half_widths):
+        half_widths = np.asarray(half_widths)
+        min_cols = ((coords[:, 0] - half_widths) // self.cell_size).astype(int).tolist()
+        min_rows = ((coords[:, 1] - half_widths) // self.cell_size).astype(int).tolist()
+        max_cols = ((coords[:, 0] + half_widths) // self.cell_size).astype(int).tolist()
+        max_rows = ((coords[:, 1] + half_widths) // self.cell_size).astype(int).tolist()
+
+        for (item, min_col, min_row, max_col, max_row) in zip(items, min_cols, min_rows, max_cols, max_rows):
+            for col in range(min_col, max_col + 1):
+                for row in range(min_row, max_row + 1):
+                    if (col, row) in self.cells:
+                        self.cells[(col, row)].append(item)
+                    else:
+                        self.cells[(col, row)] = [item]
+
+    # Return list of items that might contain the parm vertex.
+    def query_point(self, vertex):
+        return self.cells.get(self.cell_of(vertex), [])
+
+    # Return list of items that might touch the line segment from v1 to v2. That's every item in the cells that the
+    # segment's bounding box overlaps. Each item is only in the list once, and the order is always the same.
+    def query_segment(self, v1, v2):
+        (min_col, min_row) = self.cell_of([min(v1[0], v2[0]), min(v1[1], v2[1])])
+        (max_col, max_row) = self.cell_of([max(v1[0], v2[0]), max(v1[1], v2[1])])
+        if min_col == max_col and min_row == max_row:
+            return self.cells.get((min_col, min_row), [])
+
+        items = {}                                  # Dictionary rather than set, so that the order is kept.
+        for col in range(min_col, max_col + 1):
+            for row in range(min_row, max_row + 1):
+                for item in self.cells.get((col, row), []):
+                    items[item] = True
+        return list(items)
@@ -0,0 +1,50 @@
+# Cache of pre-rendered sprites, so that shapes which have been drawn before can be drawn again with a single blit.
+#
+# Sprites are rendered on demand the first time they are asked for. When the total size of the cached sprites goes
+# over the memory budget, the least recently used sprites are thrown away.
+
+from collections import OrderedDict
+
+
+class SpriteCache:
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes                  # Memory budget for all of the cached sprites.
+        self.bytes_used = 0
+        self.sprites = OrderedDict()                # Least recently used sprite is first.
+
+        self.hits = 0                               # Number of times a sprite was found in the cache.
+        self.misses = 0                             # Number of times a sprite had to be rendered.
+        self.evictions = 0                          # Number of sprites thrown away to stay within budget.
+
+    # Return the sprite for parm key. If it isn't in the cache, parm render function is called to make it.
+    def get(self, key, render):
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            self.hits += 1
+            return sprite
+
+        self.misses += 1
+        sprite = render()
+        self.sprites[key] = sprite
+        self.bytes_used += self.sprite_bytes(sprite)
+
+        while self.bytes_used > self.max_bytes and len(self.sprites) > 1:
+            (old_key, old_sprite) = self.sprites.popitem(last=False)
+            self.bytes_used -= self.sprite_bytes(old_sprite)
+            self.evictions += 1
+
+        return sprite
+
+    # Approximate memory used by the parm sprite.
+    @staticmethod
+    def sprite_bytes(sprite):
+        return sprite.get_width() * sprite.get_height() * sprite.get_bytesize()
+
+    # Percentage of requests that were found in the cache.
+    def hit_rate(self):
+        requests = self.hits + self.misses
+        if requests == 0:
+            return 0
+        return 100 * self.hits / requests
@@ -12,3 +12,52 @@ import cartesian_coordinates as cc
 
 print('Should be true', cc.is_inside_triangle([10, 15], [0, 0], [10, 30], [20, 0]))
 print('Should be false', cc.is_inside_triangle([25, 15], [0, 0], [10, 30], [20, 0]))
+
+# Test that the batch functions give same answers as the one vertex at a time functions.
+import numpy as np
+
+vertices = [[0, 10], [-5, -5], [3.5, 2]]
+batch_rotated = cc.batch_rotate_around_origin(np.array(vertices), 30)
+print('Should be true', all(np.allclose(batch_rotated[i], cc.rotate_around_origin(v, 30))
+                            for i, v in enumerate(vertices)))
+print('Should be true', np.allclose(cc.batch_translation(np.array(vertices), [7, -3])[2],
+                                    cc.translation(vertices[2], [7, -3])))
+print('Should be true', cc.batch_integer_coord(np.array(vertices))[2].tolist() == cc.integer_coord(vertices[2]))
+
+# Test that the trig lookup table gives the same answers as calculating exactly.
+cc.use_trig_table = False
+exact = cc.rotate_around_origin([3, 40], 370)
+cc.use_trig_table = True
+print('Should be true', np.allclose(cc.rotate_around_origin([3, 40], 370), exact))
+
+# Angles that aren't a whole number of degrees aren't in the table, so are worked out with math.sin and math.cos.
+import math
+
+angle = math.radians(12.5)
+print('Should be true', np.allclose(cc.rotate_around_origin([3, 40], 12.5),
+                                    [3 * math.cos(angle) + 40 * math.sin(angle),
+                                     - 3 * math.sin(angle) + 40 * math.cos(angle)]))
+
+# Test the polygon and circle functions, with a concave polygon shaped like an arrow head pointing right.
+#
+# (0, 20)
+#    \ ------___
+#     \          ---___
+#      > (10, 10)      >  (30, 10)
+#     /           ___---
+#    / ______---
+# (0, 0)
+arrow = [[0, 0], [30, 10], [0, 20], [10, 10]]
+print('Should be true', cc.is_inside_polygon([20, 10], arrow))
+print('Should be false', cc.is_inside_polygon([5, 10], arrow))          # In the notch.
+print('Should be false', cc.is_inside_polygon([35, 10], arrow))
+print('Should be true', cc.is_inside_polygon([20, 10], list(reversed(arrow))))
+print('Should be true', cc.is_inside_circle([3, 4], [0, 0], 5))
+print('Should be false', cc.is_inside_circle([3, 4.1], [0, 0], 5))
+
+# Test the swept collision functions. A segment that goes right through the arrow head, without either end inside it.
+print('Should be true', cc.segment_hits_polygon([-10, 10], [40, 10], arrow) is not None)
+print('Should be true', cc.segment_hits_polygon([-10, 30], [40, 30], arrow) is None)
+print('Should be true', cc.segment_hits_polygon([20, 10], [40, 10], arrow) == 0)        # Starts inside.
+print('Should be true', cc.is_segment_near_circle([-10, 5], [10, 5], [0, 0], 5))
+print('Should be false', cc.is_segment_near_circle([-10, 6], [10, 6], [0, 0], 5))
@@ -0,0 +1,33 @@
+# Cache of rendered text, so that strings which were on screen last frame don't have to be rendered again.
+#
+# Rendered text surfaces are kept for each combination of font, string and colour. When there are more than the
+# maximum number of entries, the least recently used one is thrown away.
+
+from collections import OrderedDict
+
+
+class TextCache:
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()               # Least recently used surface is first.
+
+        self.hits = 0                               # Number of times the text was found in the cache.
+        self.misses = 0                             # Number of times the text had to be rendered.
+
+    # Return a surface with parm text rendered onto it, in parm font and colour.
+    def render(self, font, text, colour):
+        key = (id(font), text, tuple(colour))
+
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, False, colour)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface